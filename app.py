@@ -1,35 +1,109 @@
 import os
+import json
+import time
 import logging
-import pandas as pd
-import numpy as np
+import tempfile
+import itertools
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash, session, stream_with_context, g
 from flask_cors import CORS
+from sqlalchemy import text
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.middleware.proxy_fix import ProxyFix
 from email_validator import validate_email, EmailNotValidError
-from models import db, User, PredictionHistory
-from ml_model import StudentPerformanceModel
+from models import db, User, PredictionHistory, PredictionHistoryWriter, UserPredictionStats, BatchJob
+from model_holder import ModelHolder, ModelReloader, ModelNotReady
+from database import normalize_database_url, engine_options, configure_sqlite
+from migrations import run_migrations
+from user_cache import UserCache
+from passwords import PasswordHasher, PasswordHasherBusy
+from batch_ingest import SUPPORTED_EXTENSIONS, iter_upload_chunks, missing_columns
+from jobs import BatchJobRunner
+from history import parse_history_filters, history_query, history_page, iter_history_export
+from suggestions import SUGGESTION_MESSAGES
+from batch_response import (BATCH_RESPONSE_FORMATS, ARROW_STREAM_MIMETYPE, columnar_batch_response,
+                            arrow_batch_response, compress_response)
+from metrics import (REGISTRY, CONTENT_TYPE, PREDICTION_ROWS, PREDICTION_ROW_ERRORS, HTTP_REQUEST_SECONDS,
+                     stage_timer)
+from logging_config import configure_logging, dropped_log_records, new_request_id, request_id_var
 import traceback
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging: LOG_LEVEL (INFO), LOG_FORMAT json or text, and with
+# LOG_QUEUE=1 records are written by a background thread from a queue of
+# LOG_QUEUE_SIZE records (dropped and counted when it is full)
+configure_logging(
+    level=os.environ.get("LOG_LEVEL", "INFO"),
+    fmt=os.environ.get("LOG_FORMAT", "json"),
+    use_queue=os.environ.get("LOG_QUEUE", "1") == "1",
+    queue_size=int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+)
 
 # Create Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default_secret_key_for_development")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Database configuration - using SQLite strictly
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///student_performance.db"
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# Database configuration: SQLite in the instance folder unless DATABASE_URL is set
+app.config["SQLALCHEMY_DATABASE_URI"] = normalize_database_url(
+    os.environ.get("DATABASE_URL", "sqlite:///student_performance.db")
+)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+    app.config["SQLALCHEMY_DATABASE_URI"],
+    pool_size=int(os.environ.get("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+    pool_timeout=int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+    pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", "300"))
+)
+app.config["SQLITE_JOURNAL_MODE"] = os.environ.get("SQLITE_JOURNAL_MODE", "wal")
+app.config["SQLITE_SYNCHRONOUS"] = os.environ.get("SQLITE_SYNCHRONOUS", "normal")
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+app.config["SQLITE_MMAP_SIZE"] = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["HISTORY_INSERT_CHUNK_SIZE"] = int(os.environ.get("HISTORY_INSERT_CHUNK_SIZE", "1000"))
+app.config["BATCH_CHUNK_SIZE"] = int(os.environ.get("BATCH_CHUNK_SIZE", "1000"))
+app.config["BATCH_JOBS_DIR"] = os.environ.get("BATCH_JOBS_DIR", os.path.join(app.instance_path, "batch_jobs"))
+app.config["BATCH_JOB_WORKERS"] = int(os.environ.get("BATCH_JOB_WORKERS", "2"))
+app.config["BATCH_JOB_STALE_SECONDS"] = int(os.environ.get("BATCH_JOB_STALE_SECONDS", "300"))
+app.config["BATCH_JOB_SWEEP_INTERVAL"] = int(os.environ.get("BATCH_JOB_SWEEP_INTERVAL", "60"))
+app.config["BATCH_JOB_RETENTION_SECONDS"] = int(os.environ.get("BATCH_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+app.config["MODEL_N_JOBS"] = int(os.environ.get("MODEL_N_JOBS", "1"))
+app.config["MODEL_PREDICT_PROCESSES"] = int(os.environ.get("MODEL_PREDICT_PROCESSES", "0"))
+app.config["MODEL_SHARD_MIN_ROWS"] = int(os.environ.get("MODEL_SHARD_MIN_ROWS", "50000"))
+app.config["MODEL_INFERENCE_ENGINE"] = os.environ.get("MODEL_INFERENCE_ENGINE", "auto")
+app.config["PREDICTION_CACHE_SIZE"] = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+app.config["PREDICTION_CACHE_TTL"] = int(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+app.config["USER_CACHE_SIZE"] = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+app.config["USER_CACHE_TTL"] = int(os.environ.get("USER_CACHE_TTL", "60"))
+app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+app.config["PASSWORD_HASH_MAX_PENDING"] = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+app.config["MODEL_WARMUP"] = os.environ.get("MODEL_WARMUP", "background")
+app.config["MODEL_READY_TIMEOUT"] = int(os.environ.get("MODEL_READY_TIMEOUT", "120"))
+app.config["MODEL_RELOAD_INTERVAL"] = float(os.environ.get("MODEL_RELOAD_INTERVAL", "5"))
+app.config["RETRAIN_CHUNK_SIZE"] = int(os.environ.get("RETRAIN_CHUNK_SIZE", "50000"))
+app.config["RETRAIN_TREES_PER_CHUNK"] = int(os.environ.get("RETRAIN_TREES_PER_CHUNK", "10"))
+app.config["RETRAIN_MAX_TREES"] = int(os.environ.get("RETRAIN_MAX_TREES", "300"))
+app.config["RETRAIN_ANCHOR_ROWS_PER_CLASS"] = int(os.environ.get("RETRAIN_ANCHOR_ROWS_PER_CLASS", "250"))
+app.config["RETRAIN_MAX_ACCURACY_DROP"] = float(os.environ.get("RETRAIN_MAX_ACCURACY_DROP", "0"))
+app.config["RESPONSE_COMPRESSION_MIN_BYTES"] = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+# Uploads reach the model one BATCH_CHUNK_SIZE chunk at a time, so smaller chunks are never sharded
+if (app.config['MODEL_PREDICT_PROCESSES'] > 1
+        and app.config['BATCH_CHUNK_SIZE'] < app.config['MODEL_SHARD_MIN_ROWS']):
+    logging.warning(f"MODEL_PREDICT_PROCESSES is set but BATCH_CHUNK_SIZE ({app.config['BATCH_CHUNK_SIZE']}) "
+                    f"is below MODEL_SHARD_MIN_ROWS ({app.config['MODEL_SHARD_MIN_ROWS']}); "
+                    f"batches will not use the process pool")
 
 # Initialize extensions
 db.init_app(app)
+with app.app_context():
+    configure_sqlite(
+        db.engine,
+        journal_mode=app.config['SQLITE_JOURNAL_MODE'],
+        synchronous=app.config['SQLITE_SYNCHRONOUS'],
+        busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+        mmap_size=app.config['SQLITE_MMAP_SIZE']
+    )
 CORS(app)
 
 # Initialize Flask-Login
@@ -39,16 +113,114 @@ login_manager.login_view = 'login'  # type: ignore
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
 
+# Users by id for load_user, so authenticated requests skip the users SELECT
+user_cache = UserCache(db.session, maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+
+# Password hashing runs on a bounded pool so logins cannot take every core
+password_hasher = PasswordHasher(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(int(user_id))
+
+_model_store = None
+
+def get_model_store():
+    """The model registry, opened on first use"""
+    global _model_store
+    if _model_store is None:
+        # Imported here so that importing the app does not pay for scikit-learn
+        from model_store import ModelStore
+        _model_store = ModelStore(os.environ.get("MODEL_STORE_DIR", os.path.join(app.instance_path, "model_store")))
+    return _model_store
+
+def load_model(version=None):
+    """Initialize the ML model
+    
+    Loads `version` if given, else the version the registry's CURRENT file
+    names, else the stored artifact matching the training config (training
+    it when there is none). Versions trained with a different config (before
+    any retraining) are refused; when CURRENT names one, e.g. after a deploy
+    changed the config, it is pointed at the config's artifact instead.
+    """
+    from ml_model import StudentPerformanceModel
+    
+    options = dict(
+        store=get_model_store(),
+        n_jobs=app.config['MODEL_N_JOBS'],
+        predict_processes=app.config['MODEL_PREDICT_PROCESSES'],
+        shard_min_rows=app.config['MODEL_SHARD_MIN_ROWS'],
+        inference_engine=app.config['MODEL_INFERENCE_ENGINE'],
+        cache_size=app.config['PREDICTION_CACHE_SIZE'],
+        cache_ttl=app.config['PREDICTION_CACHE_TTL']
+    )
+    if version is not None:
+        return StudentPerformanceModel(version=version, **options)
+    
+    current = get_model_store().current()
+    if current is not None:
+        try:
+            return StudentPerformanceModel(version=current, **options)
+        except Exception as e:
+            logging.error(f"Model {current} from the registry failed to load, using the default model: {str(e)}")
+    model = StudentPerformanceModel(**options)
+    if current is not None and current != model.version:
+        get_model_store().set_current(model.version)
+    return model
 
-# Initialize ML model
-ml_model = StudentPerformanceModel()
+# MODEL_WARMUP: 'background' loads the model on a thread while the app starts
+# serving, 'eager' loads it before the import returns, 'lazy' on first use
+model_holder = ModelHolder(load_model)
+if app.config['MODEL_WARMUP'] == 'eager':
+    model_holder.get()
+elif app.config['MODEL_WARMUP'] != 'lazy':
+    model_holder.start()
+
+# Every worker polls the registry and swaps to the version CURRENT names;
+# MODEL_RELOAD_INTERVAL=0 turns this off
+model_reloader = ModelReloader(model_holder, lambda: get_model_store().current(), load_model,
+                               interval=app.config['MODEL_RELOAD_INTERVAL'])
+if app.config['MODEL_RELOAD_INTERVAL'] > 0:
+    model_reloader.start()
+
+def get_model():
+    """The loaded model, waiting up to MODEL_READY_TIMEOUT seconds for the warm-up"""
+    return model_holder.get(app.config['MODEL_READY_TIMEOUT'])
+
+def install_model(model):
+    """Serve a retrained model here and point the registry at it, so the other workers follow"""
+    model_reloader.install(model)
+    get_model_store().set_current(model.version)
+
+_retrainer = None
+
+def get_retrainer():
+    """The Retrainer, created on first use so that importing the app does not load scikit-learn"""
+    global _retrainer
+    if _retrainer is None:
+        from retraining import Retrainer
+        _retrainer = Retrainer(
+            app, get_model, install_model, get_model_store(),
+            chunk_size=app.config['RETRAIN_CHUNK_SIZE'],
+            max_accuracy_drop=app.config['RETRAIN_MAX_ACCURACY_DROP'],
+            trees_per_chunk=app.config['RETRAIN_TREES_PER_CHUNK'],
+            max_trees=app.config['RETRAIN_MAX_TREES'],
+            anchor_rows_per_class=app.config['RETRAIN_ANCHOR_ROWS_PER_CLASS']
+        )
+    return _retrainer
+
+@app.errorhandler(ModelNotReady)
+def model_not_ready(error):
+    return jsonify({'error': str(error)}), 503
 
 # Create database tables and default user
 with app.app_context():
     db.create_all()
+    run_migrations(db.engine)
     logging.info("Database tables created successfully")
     
     # Create default demo user if it doesn't exist
@@ -61,11 +233,114 @@ with app.app_context():
             last_name='User',
             role='student'
         )
-        demo_user.set_password('demo123')
+        demo_user.set_password('demo123', password_hasher)
         db.session.add(demo_user)
         db.session.commit()
         logging.info("Default demo user created: username='demo', password='demo123'")
 
+# Prediction stage timers and row counters, looked up once
+STAGE_SECONDS = {(path, stage): stage_timer(path, stage)
+                 for path in ('single', 'batch') for stage in ('parse', 'db_write', 'serialize')}
+ROWS = {path: PREDICTION_ROWS.labels(path) for path in ('single', 'batch')}
+ROW_ERRORS = {path: PREDICTION_ROW_ERRORS.labels(path) for path in ('single', 'batch')}
+
+def _cache_stats():
+    caches = {'user': user_cache.stats()}
+    if model_holder.ready:
+        caches['prediction'] = get_model().prediction_cache.stats()
+    return caches
+
+# Cache and model state is read when /metrics is scraped, not recorded per request
+for _name, _kind, _key, _help in [
+    ('cache_hits_total', 'counter', 'hits', 'Cache lookups that found a live entry'),
+    ('cache_misses_total', 'counter', 'misses', 'Cache lookups that found nothing or an expired entry'),
+    ('cache_evictions_total', 'counter', 'evictions', 'Entries evicted to make room'),
+    ('cache_entries', 'gauge', 'size', 'Entries currently cached'),
+]:
+    REGISTRY.callback(_name, _help, _kind, ('cache',),
+                      lambda key=_key: {(name,): stats[key] for name, stats in _cache_stats().items()})
+REGISTRY.callback('model_ready', 'Whether the prediction model is loaded', 'gauge', (),
+                  lambda: {(): int(model_holder.ready)})
+
+def _model_accuracy():
+    if not model_holder.ready:
+        return {}
+    model = get_model()
+    return {(model.version,): model.accuracy}
+
+REGISTRY.callback('model_accuracy', 'Held-out accuracy of the model being served', 'gauge', ('version',),
+                  _model_accuracy)
+REGISTRY.callback('log_records_dropped_total', 'Log records dropped because the log queue was full', 'counter', (),
+                  lambda: {(): dropped_log_records()})
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    # Correlation id for every log line of this request, echoed back in X-Request-ID
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+    g.request_id_token = request_id_var.set(g.request_id)
+
+def _record_request(method, path, endpoint, status, start):
+    """Observe a request's latency and write its access line"""
+    elapsed = time.perf_counter() - start
+    HTTP_REQUEST_SECONDS.labels(endpoint, status).observe(elapsed)
+    logging.info(f"{method} {path} {status} {elapsed * 1e3:.1f} ms", extra={
+        'method': method, 'path': path, 'status': status, 'duration_ms': round(elapsed * 1e3, 3)
+    })
+
+@app.after_request
+def record_request_time(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        args = (request.method, request.path, request.endpoint or 'none', response.status_code, start)
+        if response.is_streamed:
+            # The body is generated after this returns; time the request until the server closes it
+            request_id = g.get('request_id')
+            
+            def record_on_close():
+                token = request_id_var.set(request_id)
+                try:
+                    _record_request(*args)
+                finally:
+                    request_id_var.reset(token)
+            
+            response.call_on_close(record_on_close)
+        else:
+            _record_request(*args)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def clear_request_id(exception=None):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        request_id_var.reset(token)
+
+def stream_with_request_id(generator):
+    """stream_with_context that also keeps the request's correlation id on the body's log lines
+    
+    Teardown resets request_id_var when the view returns, before the server
+    iterates a streamed body, so it is set again around the generator.
+    """
+    request_id = g.get('request_id')
+    
+    def generate():
+        token = request_id_var.set(request_id)
+        try:
+            yield from generator
+        finally:
+            request_id_var.reset(token)
+    
+    return stream_with_context(generate())
+
+@app.cli.command('rebuild-prediction-stats')
+def rebuild_prediction_stats():
+    """Recompute every user's prediction statistics from the prediction history"""
+    users = UserPredictionStats.rebuild(db.session)
+    db.session.commit()
+    print(f"Rebuilt prediction statistics for {users} users")
+
 # Authentication routes
 @app.route('/')
 def index():
@@ -77,13 +352,13 @@ def index():
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Login page"""
-    logging.info(f"Login route accessed - Method: {request.method}")
+    logging.debug(f"Login route accessed - Method: {request.method}")
     if current_user.is_authenticated:
-        logging.info("User already authenticated, redirecting to index")
+        logging.debug("User already authenticated, redirecting to index")
         return redirect(url_for('index'))
     
     if request.method == 'POST':
-        logging.info("POST request received to /login")
+        logging.debug("POST request received to /login")
         data = request.get_json() if request.is_json else request.form
         username = data.get('username', '').strip()
         password = data.get('password', '')
@@ -104,10 +379,20 @@ def login():
             (User.username == username) | (User.email == username)
         ).first()
         
-        logging.info(f"User found: {user is not None}")
+        logging.debug(f"User found: {user is not None}")
         
-        if user and user.check_password(password):
-            logging.info(f"Password check passed for user: {username}")
+        try:
+            password_ok = user is not None and user.check_password(password, password_hasher)
+        except PasswordHasherBusy:
+            logging.warning("Login deferred: password hasher busy")
+            error = 'Too many login attempts right now. Please try again in a moment.'
+            if request.is_json:
+                return jsonify({'error': error}), 503
+            flash(error, 'error')
+            return render_template('auth/login.html'), 503
+        
+        if password_ok:
+            logging.debug(f"Password check passed for user: {username}")
             if not user.active_status:
                 error = 'Your account has been deactivated. Please contact an administrator.'
                 logging.warning(f"Login failed: account deactivated for {username}")
@@ -118,6 +403,13 @@ def login():
             
             login_user(user, remember=remember)
             user.last_login = datetime.utcnow()
+            if password_hasher.needs_rehash(user.password_hash):
+                # Hashing parameters changed since this password was set
+                try:
+                    user.set_password(password, password_hasher)
+                    logging.info(f"Rehashed password for {username} with {password_hasher.method}")
+                except PasswordHasherBusy:
+                    pass
             db.session.commit()
             logging.info(f"User {username} logged in successfully")
             
@@ -202,7 +494,7 @@ def register():
                 last_name=last_name,
                 role=role
             )
-            user.set_password(password)
+            user.set_password(password, password_hasher)
             
             db.session.add(user)
             db.session.commit()
@@ -216,6 +508,14 @@ def register():
             flash('Registration successful! Welcome to the Student Performance Prediction System.', 'success')
             return redirect(url_for('index'))
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            logging.warning("Registration deferred: password hasher busy")
+            error = 'Too many requests right now. Please try again in a moment.'
+            if request.is_json:
+                return jsonify({'error': error}), 503
+            flash(error, 'error')
+            return render_template('auth/register.html'), 503
         except Exception as e:
             db.session.rollback()
             logging.error(f"Registration error: {str(e)}")
@@ -240,31 +540,22 @@ def dashboard():
     """User dashboard"""
     # Get user's recent predictions
     recent_predictions = PredictionHistory.query.filter_by(user_id=current_user.id)\
-        .order_by(PredictionHistory.created_at.desc()).limit(10).all()
+        .order_by(PredictionHistory.created_at.desc(), PredictionHistory.id.desc()).limit(10).all()
     
-    # Get all predictions for statistics
-    all_predictions = PredictionHistory.query.filter_by(user_id=current_user.id).all()
-    total_predictions = len(all_predictions)
+    # Statistics come from the user's running totals, kept up to date on every insert
+    stats = db.session.get(UserPredictionStats, current_user.id) or UserPredictionStats(
+        total_predictions=0, confidence_sum=0.0
+    )
+    total_predictions = stats.total_predictions
     
     # Calculate performance distribution
-    performance_stats = {
-        'Excellent': 0,
-        'Good': 0,
-        'Average': 0,
-        'Poor': 0
-    }
-    
-    total_confidence = 0
-    for pred in all_predictions:
-        if pred.predicted_performance in performance_stats:
-            performance_stats[pred.predicted_performance] += 1
-        total_confidence += pred.confidence
+    performance_stats = stats.get_performance_stats()
     
-    avg_confidence = (total_confidence / total_predictions * 100) if total_predictions > 0 else 0
+    avg_confidence = (stats.confidence_sum / total_predictions * 100) if total_predictions > 0 else 0
     
     # Get batch vs single statistics
-    batch_count = PredictionHistory.query.filter_by(user_id=current_user.id, prediction_type='batch').count()
-    single_count = PredictionHistory.query.filter_by(user_id=current_user.id, prediction_type='single').count()
+    batch_count = stats.batch_count or 0
+    single_count = stats.single_count or 0
     
     return render_template('dashboard.html', 
                          user=current_user, 
@@ -280,6 +571,7 @@ def dashboard():
 def predict_single():
     """Predict performance for a single student"""
     try:
+        start = time.perf_counter()
         data = request.get_json()
         
         # Validate required fields
@@ -305,12 +597,21 @@ def predict_single():
             'Projects_Handled': int(data['projects_handled']),
             'Assignments_Completed': int(data['assignments_completed'])
         }
+        STAGE_SECONDS['single', 'parse'].observe(time.perf_counter() - start)
         
-        # Make prediction
-        prediction, suggestions = ml_model.predict_single(student_data)
-        confidence = ml_model.get_prediction_confidence(student_data)
+        # Make prediction; one forest pass gives both the label and its confidence
+        include_probabilities = bool(data.get('include_probabilities', False))
+        probabilities = None
+        if include_probabilities:
+            prediction, confidence, suggestions, probabilities = get_model().predict_with_confidence(
+                student_data, include_probabilities=True
+            )
+        else:
+            prediction, confidence, suggestions = get_model().predict_with_confidence(student_data)
+        ROWS['single'].inc()
         
         # Save prediction to history
+        start = time.perf_counter()
         try:
             prediction_record = PredictionHistory(
                 user_id=current_user.id,
@@ -329,10 +630,17 @@ def predict_single():
                 prediction_type='single'
             )
             db.session.add(prediction_record)
+            UserPredictionStats.record(db.session, [{
+                'user_id': current_user.id,
+                'predicted_performance': prediction,
+                'prediction_type': 'single',
+                'confidence': confidence
+            }])
             db.session.commit()
         except Exception as e:
             logging.error(f"Error saving prediction history: {str(e)}")
             db.session.rollback()
+        STAGE_SECONDS['single', 'db_write'].observe(time.perf_counter() - start)
         
         result = {
             'student_name': data['student_name'],
@@ -340,10 +648,16 @@ def predict_single():
             'suggestions': suggestions,
             'confidence': confidence
         }
+        if probabilities is not None:
+            result['probabilities'] = probabilities
         
-        return jsonify(result)
+        with STAGE_SECONDS['single', 'serialize'].time():
+            return jsonify(result)
         
+    except ModelNotReady:
+        raise
     except Exception as e:
+        ROW_ERRORS['single'].inc()
         logging.error(f"Error in predict_single: {str(e)}")
         logging.error(traceback.format_exc())
         return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
@@ -351,112 +665,483 @@ def predict_single():
 @app.route('/api/predict_batch', methods=['POST'])
 @login_required
 def predict_batch():
-    """Predict performance for multiple students from Excel file"""
+    """Predict performance for multiple students from an uploaded spreadsheet
+    
+    ?suggestions=ids returns each student's suggestions as ids into a
+    'suggestion_messages' list sent once with the response. ?format=columnar
+    returns column arrays instead of one object per student, and
+    ?format=arrow (or Accept: application/vnd.apache.arrow.stream) an Arrow
+    IPC stream when pyarrow is installed; both always use suggestion ids. Responses are compressed
+    when the client accepts gzip or zstd.
+    """
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
+        suggestion_format = request.args.get('suggestions', 'text')
+        if suggestion_format not in ('text', 'ids'):
+            return jsonify({'error': 'suggestions must be text or ids'}), 400
         
-        if not file.filename or not file.filename.lower().endswith(('.xlsx', '.xls')):
-            return jsonify({'error': 'Invalid file format. Please upload Excel file (.xlsx or .xls)'}), 400
+        response_format = request.args.get('format')
+        if response_format is None:
+            accepts_arrow = ('arrow' in BATCH_RESPONSE_FORMATS and request.accept_mimetypes.best_match(
+                ['application/json', ARROW_STREAM_MIMETYPE]) == ARROW_STREAM_MIMETYPE)
+            response_format = 'arrow' if accepts_arrow else 'rows'
+        if response_format not in BATCH_RESPONSE_FORMATS:
+            return jsonify({'error': f'format must be one of: {", ".join(BATCH_RESPONSE_FORMATS)}'}), 400
+        if response_format != 'rows':
+            suggestion_format = 'ids'
         
-        # Read Excel file
-        try:
-            df = pd.read_excel(file)
-        except Exception as e:
-            return jsonify({'error': f'Error reading Excel file: {str(e)}'}), 400
-        
-        # Validate columns
-        required_columns = [
-            'Student_Name', 'Previous_Grades', 'Attendance_Percentage', 'Study_Hours_Per_Day',
-            'Extracurricular_Activities', 'Interactiveness', 'Practical_Knowledge',
-            'Communication_Skill', 'Projects_Handled', 'Assignments_Completed'
-        ]
+        file, error_response = _uploaded_batch_file()
+        if error_response:
+            return error_response
         
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return jsonify({'error': f'Missing columns in Excel file: {", ".join(missing_columns)}'}), 400
+        chunks, error_response = _open_batch_upload(file, file.filename)
+        if error_response:
+            return error_response
         
-        # Make predictions for all students
+        # Make predictions chunk by chunk, one model pass per chunk
         results = []
         performance_stats = {'Poor': 0, 'Average': 0, 'Good': 0, 'Excellent': 0}
+        history = PredictionHistoryWriter(db.session, app.config['HISTORY_INSERT_CHUNK_SIZE'])
+        
+        for chunk in chunks:
+            results.extend(_predict_batch_chunk(chunk, history, performance_stats, current_user.id,
+                                                suggestion_format))
         
-        for index, row in df.iterrows():
+        # Write the remaining prediction records and commit them together
+        try:
+            history.commit()
+            saved_predictions = history.rows_written
+        except Exception as e:
+            logging.error(f"Error committing batch predictions: {str(e)}")
+            db.session.rollback()
+            saved_predictions = 0
+        
+        summary = {
+            'performance_stats': performance_stats,
+            'total_students': len(results),
+            'saved_predictions': saved_predictions
+        }
+        start = time.perf_counter()
+        if response_format == 'arrow':
             try:
-                student_data = {
-                    'Previous_Grades': float(row['Previous_Grades']),
-                    'Attendance_Percentage': float(row['Attendance_Percentage']),
-                    'Study_Hours_Per_Day': float(row['Study_Hours_Per_Day']),
-                    'Extracurricular_Activities': int(row['Extracurricular_Activities']),
-                    'Interactiveness': 1 if str(row['Interactiveness']).lower() == 'yes' else 0,
-                    'Practical_Knowledge': str(row['Practical_Knowledge']),
-                    'Communication_Skill': str(row['Communication_Skill']),
-                    'Projects_Handled': int(row['Projects_Handled']),
-                    'Assignments_Completed': int(row['Assignments_Completed'])
-                }
-                
-                prediction, suggestions = ml_model.predict_single(student_data)
-                confidence = ml_model.get_prediction_confidence(student_data)
-                performance_stats[prediction] += 1
+                response = Response(arrow_batch_response(results, summary), mimetype=ARROW_STREAM_MIMETYPE)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 406
+        elif response_format == 'columnar':
+            response = jsonify(columnar_batch_response(results, summary))
+        else:
+            response = dict(summary, results=results)
+            if suggestion_format == 'ids':
+                response['suggestion_messages'] = SUGGESTION_MESSAGES
+            response = jsonify(response)
+        response = compress_response(response, request.accept_encodings, app.config['RESPONSE_COMPRESSION_MIN_BYTES'])
+        STAGE_SECONDS['batch', 'serialize'].observe(time.perf_counter() - start)
+        return response
+        
+    except ModelNotReady:
+        raise
+    except Exception as e:
+        logging.error(f"Error in predict_batch: {str(e)}")
+        logging.error(traceback.format_exc())
+        return jsonify({'error': f'Batch prediction failed: {str(e)}'}), 500
+
+@app.route('/api/predict_batch/stream', methods=['POST'])
+@login_required
+def predict_batch_stream():
+    """Stream batch predictions back as they are made
+    
+    The upload is read, predicted and persisted one chunk at a time, and each
+    student's result is sent as soon as its chunk is committed. Responds with
+    NDJSON by default, or server-sent events when the client accepts
+    text/event-stream or passes ?format=sse.
+    """
+    file, error_response = _uploaded_batch_file()
+    if error_response:
+        return error_response
+    
+    # Flask closes request.files once the view returns, before the response
+    # is streamed, so read from a private copy of the upload instead
+    upload = tempfile.TemporaryFile()
+    file.save(upload)
+    upload.seek(0)
+    
+    chunks, error_response = _open_batch_upload(upload, file.filename)
+    if error_response:
+        upload.close()
+        return error_response
+    
+    use_sse = (request.args.get('format') == 'sse' or
+               request.accept_mimetypes.best == 'text/event-stream')
+    
+    def encode(event, payload):
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps(dict(payload, type=event)) + '\n'
+    
+    def generate():
+        performance_stats = {'Poor': 0, 'Average': 0, 'Good': 0, 'Excellent': 0}
+        total_students = 0
+        saved_predictions = 0
+        try:
+            for chunk in chunks:
+                history = PredictionHistoryWriter(db.session, app.config['HISTORY_INSERT_CHUNK_SIZE'])
+                results = _predict_batch_chunk(chunk, history, performance_stats, current_user.id)
                 
-                # Save to prediction history
+                # Persist the chunk before sending its results or reading the next one
                 try:
-                    prediction_record = PredictionHistory(
-                        user_id=current_user.id,
-                        student_name=str(row['Student_Name']),
-                        predicted_performance=prediction,
-                        confidence=confidence,
-                        previous_grades=student_data['Previous_Grades'],
-                        attendance_percentage=student_data['Attendance_Percentage'],
-                        study_hours_per_day=student_data['Study_Hours_Per_Day'],
-                        extracurricular_activities=student_data['Extracurricular_Activities'],
-                        interactiveness=bool(student_data['Interactiveness']),
-                        practical_knowledge=student_data['Practical_Knowledge'],
-                        communication_skill=student_data['Communication_Skill'],
-                        projects_handled=student_data['Projects_Handled'],
-                        assignments_completed=student_data['Assignments_Completed'],
-                        prediction_type='batch'
-                    )
-                    db.session.add(prediction_record)
+                    history.commit()
+                    saved_predictions += history.rows_written
                 except Exception as e:
-                    logging.error(f"Error saving batch prediction history for row {index}: {str(e)}")
+                    logging.error(f"Error committing batch predictions: {str(e)}")
+                    db.session.rollback()
                 
+                with STAGE_SECONDS['batch', 'serialize'].time():
+                    lines = ''.join(encode('result', result) for result in results)
+                yield lines
+                total_students += len(results)
+            
+            yield encode('summary', {
+                'performance_stats': performance_stats,
+                'total_students': total_students,
+                'saved_predictions': saved_predictions
+            })
+        except Exception as e:
+            logging.error(f"Error in predict_batch_stream: {str(e)}")
+            logging.error(traceback.format_exc())
+            db.session.rollback()
+            yield encode('error', {'error': f'Batch prediction failed: {str(e)}'})
+        finally:
+            upload.close()
+    
+    return Response(
+        stream_with_request_id(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs/predict_batch', methods=['POST'])
+@login_required
+def submit_batch_job():
+    """Queue a batch prediction job and return its id right away"""
+    try:
+        file, error_response = _uploaded_batch_file()
+        if error_response:
+            return error_response
+        
+        job = batch_jobs.submit(file, file.filename, current_user.id)
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('batch_job_status', job_id=job.id),
+            'results_url': url_for('batch_job_results', job_id=job.id)
+        }), 202
+        
+    except Exception as e:
+        logging.error(f"Error submitting batch job: {str(e)}")
+        logging.error(traceback.format_exc())
+        return jsonify({'error': f'Failed to queue batch prediction: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def batch_job_status(job_id):
+    """Progress and, once finished, the summary of a batch job"""
+    job = BatchJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/results')
+@login_required
+def batch_job_results(job_id):
+    """Page through the results a batch job has committed so far"""
+    job = BatchJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+    results = batch_jobs.read_results(job, offset, limit)
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'offset': offset,
+        'next_offset': offset + len(results),
+        'processed_rows': job.processed_rows,
+        'results': results
+    })
+
+@app.route('/api/admin/retrain', methods=['POST'])
+@login_required
+def start_retrain():
+    """Retrain the model on new prediction history in the background and swap it in"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    try:
+        get_model()
+        retrainer = get_retrainer()
+        if not retrainer.start():
+            return jsonify({'error': 'A retrain is already running in this or another worker',
+                            'status': retrainer.status}), 409
+        return jsonify({'status': retrainer.status, 'status_url': url_for('retrain_status')}), 202
+        
+    except ModelNotReady:
+        raise
+    except Exception as e:
+        logging.error(f"Error starting retrain: {str(e)}")
+        return jsonify({'error': f'Failed to start retraining: {str(e)}'}), 500
+
+@app.route('/api/admin/retrain')
+@login_required
+def retrain_status():
+    """State of the last retrain and the model being served"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    status = _retrainer.status if _retrainer is not None else {'state': 'idle'}
+    model = get_model()
+    return jsonify({
+        'status': status,
+        'model': {'version': model.version, 'accuracy': round(model.accuracy, 4),
+                  'training_stats': model.training_stats}
+    })
+
+@app.route('/api/admin/models')
+@login_required
+def list_models():
+    """The stored model versions, the one the registry points at and the one this worker serves"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    store = get_model_store()
+    return jsonify({
+        'current': store.current(),
+        'serving': get_model().version,
+        'versions': store.versions()
+    })
+
+@app.route('/api/admin/models/current', methods=['POST'])
+@login_required
+def set_current_model():
+    """Point the registry at a stored version; every worker loads it in the background and swaps"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    try:
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        if not isinstance(version, str):
+            return jsonify({'error': 'version is required'}), 400
+        
+        store = get_model_store()
+        if not store.matches_base_config(version, get_model().get_training_config()):
+            return jsonify({'error': f'Model artifact {version} was trained with a different configuration'}), 409
+        store.set_current(version)
+        model_reloader.request()
+        return jsonify({'current': version, 'serving': get_model().version}), 202
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except ModelNotReady:
+        raise
+    except Exception as e:
+        logging.error(f"Error setting the current model: {str(e)}")
+        return jsonify({'error': f'Failed to set the current model: {str(e)}'}), 500
+
+@app.route('/api/history')
+@login_required
+def prediction_history():
+    """Page through the user's predictions, newest first
+    
+    Filters: performance and type (repeatable), start/end (ISO dates, end
+    exclusive). Pass the returned next_cursor as ?cursor= for the next page.
+    """
+    try:
+        filters = parse_history_filters(request.args)
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        predictions, next_cursor = history_page(
+            db.session, history_query(current_user.id, **filters),
+            cursor=request.args.get('cursor'), limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'predictions': [prediction.to_dict() for prediction in predictions],
+        'next_cursor': next_cursor,
+        'limit': limit
+    })
+
+@app.route('/api/history/export')
+@login_required
+def export_prediction_history():
+    """Stream the user's full (filtered) history as NDJSON or, with ?format=csv, CSV"""
+    try:
+        filters = parse_history_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+    
+    query = history_query(current_user.id, **filters)
+    filename = f"prediction_history.{'csv' if export_format == 'csv' else 'ndjson'}"
+    return Response(
+        stream_with_request_id(iter_history_export(db.session, query, export_format)),
+        mimetype='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+BATCH_REQUIRED_COLUMNS = [
+    'Student_Name', 'Previous_Grades', 'Attendance_Percentage', 'Study_Hours_Per_Day',
+    'Extracurricular_Activities', 'Interactiveness', 'Practical_Knowledge',
+    'Communication_Skill', 'Projects_Handled', 'Assignments_Completed'
+]
+
+def _uploaded_batch_file():
+    """Return (file, None) for a valid batch upload, or (None, error_response)"""
+    if 'file' not in request.files:
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
+    
+    file = request.files['file']
+    if file.filename == '':
+        return None, (jsonify({'error': 'No file selected'}), 400)
+    
+    if not file.filename or not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return None, (jsonify({'error': f'Invalid file format. Please upload one of: '
+                                        f'{", ".join(SUPPORTED_EXTENSIONS)}'}), 400)
+    return file, None
+
+def _open_batch_upload(file, filename):
+    """Start reading an upload in chunks and validate its header
+    
+    Returns (chunks, None), or (None, error_response) when the file cannot be
+    read or lacks required columns.
+    """
+    try:
+        start = time.perf_counter()
+        chunks = iter_upload_chunks(file, filename, app.config['BATCH_CHUNK_SIZE'])
+        first_chunk = next(chunks)
+        STAGE_SECONDS['batch', 'parse'].observe(time.perf_counter() - start)
+    except Exception as e:
+        return None, (jsonify({'error': f'Error reading uploaded file: {str(e)}'}), 400)
+    
+    missing = missing_columns(first_chunk.columns, BATCH_REQUIRED_COLUMNS)
+    if missing:
+        return None, (jsonify({'error': f'Missing columns in uploaded file: {", ".join(missing)}'}), 400)
+    
+    return itertools.chain([first_chunk], _timed_chunks(chunks)), None
+
+def _timed_chunks(chunks):
+    """Pass upload chunks through, timing how long each takes to read"""
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        STAGE_SECONDS['batch', 'parse'].observe(time.perf_counter() - start)
+        yield chunk
+
+def _predict_batch_chunk(df, history, performance_stats, user_id, suggestion_format='text'):
+    """Predict one chunk of an upload, queue its history rows and return its results
+    
+    With suggestion_format 'ids' each result carries 'suggestion_ids', indexes
+    into SUGGESTION_MESSAGES, instead of the suggestion texts.
+    """
+    results = []
+    if df.empty:
+        return results
+    
+    model = get_model()
+    with STAGE_SECONDS['batch', 'parse'].time():
+        students = _batch_student_frame(df, model)
+    predictions = model.predict_batch(students)
+    ROWS['batch'].inc(len(df))
+    ROW_ERRORS['batch'].inc(int(predictions['Error'].notna().sum()))
+    student_names = df['Student_Name'].astype(str).tolist()
+    
+    suggestion_key = 'suggestion_ids' if suggestion_format == 'ids' else 'suggestions'
+    suggestion_column = 'Suggestion_Ids' if suggestion_format == 'ids' else 'Suggestions'
+    
+    for index, student_name, student_data, prediction, confidence, suggestions, error in zip(
+        df.index, student_names,
+        predictions[model.INPUT_COLUMNS].to_dict('records'),
+        predictions['Prediction'], predictions['Confidence'],
+        predictions[suggestion_column], predictions['Error']
+    ):
+        if error is not None:
+            logging.error(f"Error processing row {index}: {error}")
+            if suggestion_format == 'ids':
                 results.append({
-                    'student_name': str(row['Student_Name']),
-                    'predicted_performance': prediction,
-                    'suggestions': suggestions,
-                    'confidence': confidence
+                    'student_name': student_name,
+                    'predicted_performance': 'Error',
+                    'suggestion_ids': [],
+                    'error': f'Error processing data: {error}',
+                    'confidence': 0
                 })
-                
-            except Exception as e:
-                logging.error(f"Error processing row {index}: {str(e)}")
+            else:
                 results.append({
-                    'student_name': str(row.get('Student_Name', f'Student {index}')),
+                    'student_name': student_name,
                     'predicted_performance': 'Error',
-                    'suggestions': [f'Error processing data: {str(e)}'],
+                    'suggestions': [f'Error processing data: {error}'],
                     'confidence': 0
                 })
+            continue
+        
+        performance_stats[prediction] += 1
         
-        # Commit all prediction records
+        # Queue for prediction history; rows are written in chunks
         try:
-            db.session.commit()
+            history.add(
+                user_id=user_id,
+                student_name=student_name,
+                predicted_performance=prediction,
+                confidence=confidence,
+                previous_grades=student_data['Previous_Grades'],
+                attendance_percentage=student_data['Attendance_Percentage'],
+                study_hours_per_day=student_data['Study_Hours_Per_Day'],
+                extracurricular_activities=student_data['Extracurricular_Activities'],
+                interactiveness=bool(student_data['Interactiveness']),
+                practical_knowledge=student_data['Practical_Knowledge'],
+                communication_skill=student_data['Communication_Skill'],
+                projects_handled=student_data['Projects_Handled'],
+                assignments_completed=student_data['Assignments_Completed'],
+                prediction_type='batch'
+            )
         except Exception as e:
-            logging.error(f"Error committing batch predictions: {str(e)}")
-            db.session.rollback()
+            logging.error(f"Error saving batch prediction history for row {index}: {str(e)}")
         
-        return jsonify({
-            'results': results,
-            'performance_stats': performance_stats,
-            'total_students': len(results)
+        results.append({
+            'student_name': student_name,
+            'predicted_performance': prediction,
+            suggestion_key: suggestions,
+            'confidence': float(confidence)
         })
-        
-    except Exception as e:
-        logging.error(f"Error in predict_batch: {str(e)}")
-        logging.error(traceback.format_exc())
-        return jsonify({'error': f'Batch prediction failed: {str(e)}'}), 500
+    
+    return results
+
+def _batch_student_frame(df, model):
+    """Map uploaded spreadsheet columns to the model's student_data columns"""
+    students = df[model.INPUT_COLUMNS].copy()
+    students['Interactiveness'] = (df['Interactiveness'].astype(str).str.lower() == 'yes').astype(int)
+    for column in model.CATEGORICAL_COLUMNS:
+        students[column] = df[column].astype(str)
+    return students
+
+# Background batch-prediction jobs; resume any left unfinished by a previous process
+batch_jobs = BatchJobRunner(
+    app,
+    process_chunk=_predict_batch_chunk,
+    required_columns=BATCH_REQUIRED_COLUMNS,
+    jobs_dir=app.config['BATCH_JOBS_DIR'],
+    max_workers=app.config['BATCH_JOB_WORKERS'],
+    chunk_size=app.config['BATCH_CHUNK_SIZE'],
+    insert_chunk_size=app.config['HISTORY_INSERT_CHUNK_SIZE'],
+    stale_after=app.config['BATCH_JOB_STALE_SECONDS'],
+    retention=app.config['BATCH_JOB_RETENTION_SECONDS']
+)
+with app.app_context():
+    batch_jobs.recover()
+# Resume jobs orphaned by a worker that died while this one keeps running;
+# BATCH_JOB_SWEEP_INTERVAL=0 turns this off
+if app.config['BATCH_JOB_SWEEP_INTERVAL'] > 0:
+    batch_jobs.start_sweeper(app.config['BATCH_JOB_SWEEP_INTERVAL'])
 
 @app.route('/presentation')
 @login_required
@@ -471,16 +1156,60 @@ def full_presentation():
     from datetime import datetime
     return render_template('full_presentation.html', user=current_user, current_date=datetime.now().strftime('%B %d, %Y'))
 
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: the model is loaded and the database answers"""
+    checks = {'model': model_holder.ready}
+    try:
+        db.session.execute(text('SELECT 1'))
+        checks['database'] = True
+    except Exception as e:
+        logging.error(f"Readiness check failed to reach the database: {str(e)}")
+        checks['database'] = False
+    
+    response = {'ready': all(checks.values()), 'checks': checks}
+    if model_holder.error is not None:
+        response['model_error'] = str(model_holder.error)
+    elif model_holder.ready:
+        response['model_load_seconds'] = round(model_holder.load_seconds, 3)
+    return jsonify(response), 200 if response['ready'] else 503
+
+@app.route('/metrics')
+def metrics():
+    """Prediction stage timings, row counts, request latencies and cache counters
+    
+    Prometheus text exposition format; like /healthz, not behind the login.
+    """
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/api/model_info')
 def model_info():
     """Get information about the ML model"""
     try:
-        info = ml_model.get_model_info()
+        info = get_model().get_model_info()
+        info['load_seconds'] = model_holder.load_seconds and round(model_holder.load_seconds, 3)
+        info['loaded_at'] = datetime.utcfromtimestamp(model_holder.loaded_at).isoformat()
         return jsonify(info)
+    except ModelNotReady as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logging.error(f"Error getting model info: {str(e)}")
         return jsonify({'error': 'Failed to get model information'}), 500
 
+@app.route('/api/cache_stats')
+@login_required
+def cache_stats():
+    """Hit and miss counters of the in-process caches"""
+    return jsonify({
+        'user_cache': user_cache.stats(),
+        'prediction_cache': get_model().prediction_cache.stats()
+    })
+
 @app.route('/api/sample_files')
 def list_sample_files():
     """List available sample Excel files"""
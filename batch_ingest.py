@@ -0,0 +1,120 @@
+import os
+from importlib.util import find_spec
+
+import pandas as pd
+
+# Parquet needs pyarrow, which is optional; uploads are only offered when it is installed
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv') + (('.parquet',) if find_spec('pyarrow') else ())
+
+
+def iter_upload_chunks(file, filename, chunk_size=1000):
+    """Yield an uploaded spreadsheet as DataFrames of at most chunk_size rows.
+
+    .xlsx files are read with openpyxl in read-only mode (first sheet, like
+    pandas.read_excel), .csv with the pandas
+    chunked reader and .parquet one record batch at a time, so only one chunk
+    is held in memory. Legacy .xls files have no streaming reader and are
+    loaded whole, then split. Chunks keep a running row index across the file,
+    and at least one (possibly empty) chunk carrying the header is yielded.
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    if extension == '.xlsx':
+        chunks = _iter_xlsx(file, chunk_size)
+    elif extension == '.csv':
+        chunks = pd.read_csv(file, chunksize=chunk_size)
+    elif extension == '.parquet':
+        chunks = _iter_parquet(file, chunk_size)
+    elif extension == '.xls':
+        chunks = _iter_frame(pd.read_excel(file), chunk_size)
+    else:
+        raise ValueError(f"Unsupported file type: {extension or filename}")
+
+    yield from chunks
+
+
+def estimate_row_count(path, filename):
+    """Cheap data-row count for progress reporting, or None if the format can't tell"""
+    extension = os.path.splitext(filename.lower())[1]
+    try:
+        if extension == '.csv':
+            with open(path, 'rb') as handle:
+                lines = sum(block.count(b'\n') for block in iter(lambda: handle.read(1 << 20), b''))
+            return max(lines - 1, 0)
+        if extension == '.xlsx':
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True)
+            try:
+                max_row = workbook.worksheets[0].max_row
+            finally:
+                workbook.close()
+            return max(max_row - 1, 0) if max_row else None
+        if extension == '.parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(path).metadata.num_rows
+    except Exception:
+        return None
+    return None
+
+
+def missing_columns(columns, required_columns):
+    """Required columns absent from a chunk's header"""
+    return [col for col in required_columns if col not in columns]
+
+
+def _iter_xlsx(file, chunk_size):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame()
+            return
+        header = [str(name).strip() if name is not None else f'Unnamed: {i}' for i, name in enumerate(header)]
+
+        offset = 0
+        buffer = []
+        for row in rows:
+            # Skip blank lines like pandas.read_excel does
+            if all(value is None for value in row):
+                continue
+            # Read-only worksheets can yield ragged rows; pad them to the header
+            buffer.append(row[:len(header)] + (None,) * (len(header) - len(row)))
+            if len(buffer) >= chunk_size:
+                yield _frame(buffer, header, offset)
+                offset += len(buffer)
+                buffer = []
+        if buffer or offset == 0:
+            yield _frame(buffer, header, offset)
+    finally:
+        workbook.close()
+
+
+def _iter_parquet(file, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet uploads require the pyarrow package")
+
+    parquet_file = pq.ParquetFile(file)
+    offset = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+    if offset == 0:
+        yield parquet_file.schema_arrow.empty_table().to_pandas()
+
+
+def _iter_frame(df, chunk_size):
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _frame(rows, header, offset):
+    return pd.DataFrame(rows, columns=header, index=pd.RangeIndex(offset, offset + len(rows)))
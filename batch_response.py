@@ -0,0 +1,112 @@
+import gzip
+import json
+from importlib.util import find_spec
+
+from suggestions import SUGGESTION_MESSAGES
+
+# Arrow needs pyarrow, which is optional; the format is only offered when it is installed
+BATCH_RESPONSE_FORMATS = ('rows', 'columnar') + (('arrow',) if find_spec('pyarrow') else ())
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Legend of the columnar predicted_performance codes
+PERFORMANCE_LABELS = ['Poor', 'Average', 'Good', 'Excellent', 'Error']
+_PERFORMANCE_CODES = {label: code for code, label in enumerate(PERFORMANCE_LABELS)}
+
+
+def columnar_batch_results(results):
+    """Turn per-student batch results (with suggestion ids) into column arrays
+
+    predicted_performance holds codes into PERFORMANCE_LABELS and
+    suggestion_ids index SUGGESTION_MESSAGES. Errors are sparse: the row
+    numbers that failed and their messages.
+    """
+    error_rows = [i for i, result in enumerate(results) if 'error' in result]
+    return {
+        'student_name': [result['student_name'] for result in results],
+        'predicted_performance': [_PERFORMANCE_CODES[result['predicted_performance']] for result in results],
+        'confidence': [result['confidence'] for result in results],
+        'suggestion_ids': [result['suggestion_ids'] for result in results],
+        'error_rows': error_rows,
+        'error_messages': [results[i]['error'] for i in error_rows]
+    }
+
+
+def columnar_batch_response(results, summary):
+    """JSON body of the columnar batch format: summary fields, legends and columns"""
+    return dict(
+        summary,
+        format='columnar',
+        performance_labels=PERFORMANCE_LABELS,
+        suggestion_messages=SUGGESTION_MESSAGES,
+        columns=columnar_batch_results(results)
+    )
+
+
+def arrow_batch_response(results, summary):
+    """Batch results as an Arrow IPC stream
+
+    One record batch with the columnar format's columns; predicted_performance
+    is dictionary-encoded and the summary fields and suggestion_messages are
+    JSON in the schema metadata. Raises ValueError without pyarrow.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Arrow responses require the pyarrow package")
+
+    columns = columnar_batch_results(results)
+    errors = [None] * len(results)
+    for row, message in zip(columns['error_rows'], columns['error_messages']):
+        errors[row] = message
+    table = pa.table({
+        'student_name': pa.array(columns['student_name'], pa.string()),
+        'predicted_performance': pa.DictionaryArray.from_arrays(
+            pa.array(columns['predicted_performance'], pa.int8()), pa.array(PERFORMANCE_LABELS)
+        ),
+        'confidence': pa.array(columns['confidence'], pa.float64()),
+        'suggestion_ids': pa.array(columns['suggestion_ids'], pa.list_(pa.uint8())),
+        'error': pa.array(errors, pa.string())
+    })
+    table = table.replace_schema_metadata({
+        'summary': json.dumps(summary),
+        'suggestion_messages': json.dumps(SUGGESTION_MESSAGES)
+    })
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress_response(response, accept_encodings, min_size=1024, level=6):
+    """Compress a response body with zstd or gzip if the client accepts it
+
+    zstd is offered when the zstandard package is installed. Bodies under
+    min_size bytes, streamed responses and responses that already carry a
+    Content-Encoding are returned unchanged.
+    """
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    zstandard = _zstd()
+    encoding = accept_encodings.best_match(['zstd', 'gzip'] if zstandard else ['gzip'])
+    if encoding == 'zstd':
+        response.set_data(zstandard.ZstdCompressor(level=level).compress(body))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(body, compresslevel=level, mtime=0))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
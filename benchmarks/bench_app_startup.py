@@ -0,0 +1,81 @@
+"""Benchmark web app startup per MODEL_WARMUP mode.
+
+Each run imports app.py in a fresh interpreter, against a scratch database
+and a model store that already holds the artifact, and reports separately:
+the time to import the app, the first /healthz response (right after the
+import), the time from process start until the model is ready, the first
+/api/predict_single request once it is, and the time from process start
+until that first prediction is returned. 'eager' is how app.py used to
+start: the model is built before the import returns.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_app_startup --repeat 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SNIPPET = '''
+import json, logging, time
+start = time.perf_counter()
+import app as appmod
+imported = time.perf_counter()
+logging.disable(logging.CRITICAL)
+client = appmod.app.test_client()
+with client.session_transaction() as session:
+    session['_user_id'] = '1'
+t = time.perf_counter()
+assert client.get('/healthz').status_code == 200
+healthz = time.perf_counter() - t
+t = time.perf_counter()
+appmod.model_holder.get()
+ready = time.perf_counter()
+response = client.post('/api/predict_single', json={
+    'student_name': 'A', 'previous_grades': 80, 'attendance': 90, 'study_hours': 6,
+    'extracurricular_activities': 3, 'interactiveness': 'yes', 'practical_knowledge': 'Good',
+    'communication_skill': 'Good', 'projects_handled': 4, 'assignments_completed': 18})
+assert response.status_code == 200, response.get_json()
+predicted = time.perf_counter()
+print(json.dumps({'import': imported - start, 'healthz': healthz, 'ready': ready - start,
+                  'first_request': predicted - ready, 'first_prediction': predicted - start}))
+'''
+
+
+def run(mode, workdir):
+    env = dict(os.environ, MODEL_WARMUP=mode,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               MODEL_STORE_DIR=os.path.join(workdir, 'model_store'))
+    output = subprocess.run(
+        [sys.executable, '-c', SNIPPET], env=env,
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        run('eager', workdir)  # create the database, demo user and model artifact
+
+        print(f"{'MODEL_WARMUP':<12} {'import s':>9} {'healthz ms':>11} {'ready s':>8} "
+              f"{'first request ms':>17} {'first prediction s':>19}")
+        for mode in ('eager', 'background', 'lazy'):
+            samples = [run(mode, workdir) for _ in range(args.repeat)]
+
+            def median(key):
+                return statistics.median(s[key] for s in samples)
+            print(f"{mode:<12} {median('import'):>9.3f} {median('healthz') * 1e3:>11.1f} "
+                  f"{median('ready'):>8.3f} {median('first_request') * 1e3:>17.1f} "
+                  f"{median('first_prediction'):>19.3f}")
+
+
+if __name__ == '__main__':
+    main()
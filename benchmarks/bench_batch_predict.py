@@ -0,0 +1,110 @@
+"""Benchmark batch prediction: per-row predict_single vs StudentPerformanceModel.predict_batch.
+
+The input is sample_data/large_class_30_students.xlsx tiled up to --rows rows.
+The per-row path (predict_single + get_prediction_confidence for every row, as
+/api/predict_batch used to do) is timed on --legacy-rows rows and extrapolated,
+because running it on 100k rows takes the better part of an hour. Before
+timing, a batch with inf, -inf, NaN and 1e30 values is checked to get one
+error per bad row on every inference engine.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_batch_predict --rows 100000
+"""
+import argparse
+import logging
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+
+SAMPLE_FILE = 'sample_data/large_class_30_students.xlsx'
+
+
+def load_students(rows):
+    """Sample class tiled to the requested number of rows, in student_data columns"""
+    df = pd.read_excel(SAMPLE_FILE)
+    df = df.iloc[np.arange(rows) % len(df)].reset_index(drop=True)
+    students = df[StudentPerformanceModel.INPUT_COLUMNS].copy()
+    students['Interactiveness'] = (df['Interactiveness'].astype(str).str.lower() == 'yes').astype(int)
+    return students
+
+
+def legacy_predict(model, students):
+    """The old /api/predict_batch loop: two forest passes per row"""
+    results = []
+    for _, row in students.iterrows():
+        student_data = {
+            'Previous_Grades': float(row['Previous_Grades']),
+            'Attendance_Percentage': float(row['Attendance_Percentage']),
+            'Study_Hours_Per_Day': float(row['Study_Hours_Per_Day']),
+            'Extracurricular_Activities': int(row['Extracurricular_Activities']),
+            'Interactiveness': int(row['Interactiveness']),
+            'Practical_Knowledge': str(row['Practical_Knowledge']),
+            'Communication_Skill': str(row['Communication_Skill']),
+            'Projects_Handled': int(row['Projects_Handled']),
+            'Assignments_Completed': int(row['Assignments_Completed'])
+        }
+        prediction, suggestions = model.predict_single(student_data)
+        confidence = model.get_prediction_confidence(student_data)
+        results.append((prediction, confidence, suggestions))
+    return results
+
+
+def check_invalid_rows(store):
+    """Non-finite and out-of-range numbers get a per-row error on every inference engine"""
+    students = load_students(7)
+    bad = [('Projects_Handled', float('inf')), ('Assignments_Completed', 1e30), ('Previous_Grades', float('inf')),
+           ('Attendance_Percentage', -float('inf')), ('Extracurricular_Activities', '1e30'),
+           ('Study_Hours_Per_Day', 'nan')]
+    students = students.astype(object)
+    for row, (column, value) in enumerate(bad, start=1):
+        students.loc[row, column] = value
+    for engine in StudentPerformanceModel.INFERENCE_ENGINES:
+        result = StudentPerformanceModel(store=store, inference_engine=engine).predict_batch(students)
+        assert result['Error'].iloc[0] is None and result['Prediction'].iloc[0] is not None
+        for row, (column, _) in enumerate(bad, start=1):
+            assert result['Error'].iloc[row].startswith(f"Invalid value for {column}"), result['Error'].iloc[row]
+            assert result['Prediction'].iloc[row] is None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--legacy-rows', type=int, default=500)
+    parser.add_argument('--store', default=None, help='model store directory (default: temporary)')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    model = StudentPerformanceModel(store=ModelStore(args.store or tempfile.mkdtemp()))
+    check_invalid_rows(model.store)
+    students = load_students(args.rows)
+
+    start = time.perf_counter()
+    legacy = legacy_predict(model, students.head(args.legacy_rows))
+    legacy_per_row = (time.perf_counter() - start) / args.legacy_rows
+
+    start = time.perf_counter()
+    batch = model.predict_batch(students)
+    batch_seconds = time.perf_counter() - start
+
+    head = batch.head(args.legacy_rows)
+    assert list(head['Prediction']) == [r[0] for r in legacy]
+    assert np.allclose(head['Confidence'], [r[1] for r in legacy])
+
+    print(f"rows: {args.rows}")
+    print(f"per-row path:  {legacy_per_row * 1e3:8.3f} ms/row  "
+          f"(~{legacy_per_row * args.rows:8.1f} s extrapolated, measured on {args.legacy_rows} rows)")
+    print(f"predict_batch: {batch_seconds / args.rows * 1e3:8.3f} ms/row  "
+          f"({batch_seconds:8.2f} s total, {args.rows / batch_seconds:,.0f} rows/s)")
+    print(f"speedup: {legacy_per_row * args.rows / batch_seconds:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark /api/predict_batch response formats: size and serialization time.
+
+Predicts --rows distinct random students once, builds the per-student
+results the way app._predict_batch_chunk does, then serializes them as the
+default row objects, rows with suggestion ids, the columnar format and (with
+pyarrow installed) an Arrow IPC stream. Each body is also compressed with
+gzip and (with zstandard installed) zstd at the level compress_response uses.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_batch_response --rows 50000
+"""
+import argparse
+import gzip
+import logging
+import tempfile
+import warnings
+
+from flask import Flask
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from suggestions import SUGGESTION_MESSAGES
+from batch_response import columnar_batch_response, arrow_batch_response
+from benchmarks.bench_prediction_cache import random_students, timed
+
+
+def batch_results(predictions, names, suggestion_column):
+    key = 'suggestion_ids' if suggestion_column == 'Suggestion_Ids' else 'suggestions'
+    return [
+        {'student_name': name, 'predicted_performance': prediction, key: suggestions, 'confidence': float(confidence)}
+        for name, prediction, confidence, suggestions in zip(
+            names, predictions['Prediction'], predictions['Confidence'], predictions[suggestion_column]
+        )
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    model = StudentPerformanceModel(store=ModelStore(tempfile.mkdtemp()), cache_size=0)
+    predictions = model.predict_batch(random_students(args.rows))
+    names = [f"Student {i}" for i in range(args.rows)]
+    summary = {
+        'performance_stats': predictions['Prediction'].value_counts().to_dict(),
+        'total_students': args.rows,
+        'saved_predictions': args.rows
+    }
+    text_results = batch_results(predictions, names, 'Suggestions')
+    id_results = batch_results(predictions, names, 'Suggestion_Ids')
+
+    dumps = Flask(__name__).json.dumps
+    formats = [
+        ('rows (default)', lambda: dumps(dict(summary, results=text_results)).encode()),
+        ('rows, suggestion ids', lambda: dumps(dict(summary, results=id_results,
+                                                   suggestion_messages=SUGGESTION_MESSAGES)).encode()),
+        ('columnar', lambda: dumps(columnar_batch_response(id_results, summary)).encode()),
+    ]
+    try:
+        import pyarrow  # noqa: F401
+        formats.append(('arrow', lambda: arrow_batch_response(id_results, summary)))
+    except ImportError:
+        print("pyarrow not installed: skipping arrow")
+
+    compressors = [('gzip', lambda body: gzip.compress(body, compresslevel=6, mtime=0))]
+    try:
+        import zstandard
+        compressors.append(('zstd', zstandard.ZstdCompressor(level=6).compress))
+    except ImportError:
+        print("zstandard not installed: skipping zstd")
+
+    print(f"rows: {args.rows:,}")
+    print(f"{'format':<22} {'MiB':>7} {'serialize s':>12}" +
+          ''.join(f" {name + ' MiB':>9} {name + ' s':>7}" for name, _ in compressors))
+    for name, serialize in formats:
+        body = serialize()
+        line = f"{name:<22} {len(body) / 2**20:>7.2f} {timed(serialize):>12.3f}"
+        for _, compress in compressors:
+            line += f" {len(compress(body)) / 2**20:>9.2f} {timed(lambda: compress(body)):>7.3f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
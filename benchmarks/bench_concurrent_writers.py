@@ -0,0 +1,151 @@
+"""Benchmark concurrent history writers and a dashboard reader per database mode.
+
+--writers processes (standing in for gunicorn workers) each commit
+--batches uploads through PredictionHistoryWriter while one more process
+reads a user's dashboard statistics and recent predictions in a loop. Like
+/api/predict_batch, an upload writes --chunks chunks of --batch-rows rows in
+one transaction, spending --work-ms between chunks (predicting the next
+one). Engines are built with database.engine_options and
+database.configure_sqlite as app.py does. SQLite runs in its previous
+configuration (rollback journal, synchronous=FULL, Python's default 5 s lock
+timeout) and with app.py's defaults (WAL, synchronous=NORMAL, 30 s busy
+timeout, 256 MiB mmap); pass --database-url to add e.g. a PostgreSQL
+database with a sized pool::
+
+    python -m benchmarks.bench_concurrent_writers --writers 4 \\
+        --database-url postgresql://localhost/student_bench
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from database import engine_options, configure_sqlite
+from models import db, User, PredictionHistory, PredictionHistoryWriter, UserPredictionStats
+from benchmarks.bench_history_insert import history_rows
+
+SQLITE_MODES = {
+    'sqlite, rollback journal': dict(journal_mode='delete', synchronous='full', busy_timeout_ms=5000),
+    'sqlite, WAL + NORMAL': dict(journal_mode='wal', synchronous='normal', busy_timeout_ms=30000,
+                                 mmap_size=256 * 1024 * 1024),
+}
+
+
+def make_engine(url, sqlite_mode):
+    engine = create_engine(url, **engine_options(url, pool_size=2, max_overflow=2))
+    if sqlite_mode is not None:
+        configure_sqlite(engine, **SQLITE_MODES[sqlite_mode])
+    return engine
+
+
+def writer(url, sqlite_mode, user_id, args, results):
+    engine = make_engine(url, sqlite_mode)
+    latencies, errors = [], 0
+    with Session(engine) as session:
+        for _ in range(args.batches):
+            start = time.perf_counter()
+            try:
+                history = PredictionHistoryWriter(session, args.batch_rows)
+                for chunk in range(args.chunks):
+                    if chunk:
+                        time.sleep(args.work_ms / 1000)
+                    for row in history_rows(user_id, args.batch_rows):
+                        history.add(**row)
+                    history.flush()
+                session.commit()
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                # "database is locked": the upload is lost, as in the app
+                session.rollback()
+                errors += 1
+    results.put(('writer', latencies, errors))
+
+
+def reader(url, sqlite_mode, user_id, stop, results):
+    engine = make_engine(url, sqlite_mode)
+    latencies, errors = [], 0
+    with Session(engine) as session:
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                session.get(UserPredictionStats, user_id)
+                session.scalars(select(PredictionHistory).where(PredictionHistory.user_id == user_id)
+                                .order_by(PredictionHistory.created_at.desc()).limit(10)).all()
+                session.commit()
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                session.rollback()
+                errors += 1
+            session.expunge_all()
+            time.sleep(0.01)
+    results.put(('reader', latencies, errors))
+
+
+def run(url, sqlite_mode, args):
+    engine = make_engine(url, sqlite_mode)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        users = [User(username=f'writer{i}', email=f'writer{i}@example.com', password_hash='x',
+                      first_name='Bench', last_name='Writer') for i in range(args.writers)]
+        session.add_all(users)
+        session.commit()
+        user_ids = [user.id for user in users]
+    engine.dispose()
+
+    context = multiprocessing.get_context('spawn')
+    results, stop = context.Queue(), context.Event()
+    read = context.Process(target=reader, args=(url, sqlite_mode, user_ids[0], stop, results))
+    writers = [context.Process(target=writer, args=(url, sqlite_mode, user_id, args, results))
+               for user_id in user_ids]
+    read.start()
+    start = time.perf_counter()
+    for process in writers:
+        process.start()
+    outcomes = [results.get() for _ in writers]
+    elapsed = time.perf_counter() - start
+    stop.set()
+    outcomes.append(results.get())
+    for process in writers + [read]:
+        process.join()
+
+    commits = [latency for kind, latencies, _ in outcomes if kind == 'writer' for latency in latencies]
+    reads = next(latencies for kind, latencies, _ in outcomes if kind == 'reader')
+    write_errors = sum(errors for kind, _, errors in outcomes if kind == 'writer')
+    read_errors = next(errors for kind, _, errors in outcomes if kind == 'reader')
+    rows = len(commits) * args.chunks * args.batch_rows
+    return (rows / elapsed, np.percentile(commits, 99) if commits else float('nan'), write_errors,
+            np.percentile(reads, 99) if reads else float('nan'), read_errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--batches', type=int, default=10)
+    parser.add_argument('--chunks', type=int, default=5)
+    parser.add_argument('--batch-rows', type=int, default=1000)
+    parser.add_argument('--work-ms', type=float, default=100)
+    parser.add_argument('--database-url', action='append', default=[])
+    args = parser.parse_args()
+
+    runs = [(name, f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}", name) for name in SQLITE_MODES]
+    runs += [(url.split('://')[0], url, None) for url in args.database_url]
+
+    print(f"{args.writers} writers x {args.batches} uploads x {args.chunks} chunks x {args.batch_rows} rows, "
+          f"{args.work_ms:g} ms between chunks, one reader")
+    print(f"{'database':<26} {'rows/s':>8} {'upload p99 ms':>14} {'write errors':>13} "
+          f"{'read p99 ms':>12} {'read errors':>12}")
+    for name, url, sqlite_mode in runs:
+        rate, commit_p99, write_errors, read_p99, read_errors = run(url, sqlite_mode, args)
+        print(f"{name:<26} {rate:>8,.0f} {commit_p99 * 1e3:>14.1f} {write_errors:>13} "
+              f"{read_p99 * 1e3:>12.1f} {read_errors:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark the dashboard statistics: all rows vs grouped aggregate vs summary table.
+
+Fills a temporary SQLite database with --rows prediction history rows for one
+user (plus a smaller second user), then computes the dashboard numbers the
+old way (PredictionHistory.query...all() counted in Python, plus two
+.count() queries), with one grouped aggregate query over the history and
+from the UserPredictionStats row the dashboard reads, checking that
+all three agree. Wall time and peak traced Python memory are measured in
+separate runs.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_dashboard_stats --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from flask import Flask
+
+from models import db, User, PredictionHistory, PredictionHistoryWriter, UserPredictionStats
+from benchmarks.bench_history_insert import history_rows
+
+
+def stats_orm(user_id):
+    """The dashboard's original statistics code"""
+    all_predictions = PredictionHistory.query.filter_by(user_id=user_id).all()
+    performance_stats = {'Excellent': 0, 'Good': 0, 'Average': 0, 'Poor': 0}
+    total_confidence = 0
+    for pred in all_predictions:
+        if pred.predicted_performance in performance_stats:
+            performance_stats[pred.predicted_performance] += 1
+        total_confidence += pred.confidence
+    batch_count = PredictionHistory.query.filter_by(user_id=user_id, prediction_type='batch').count()
+    single_count = PredictionHistory.query.filter_by(user_id=user_id, prediction_type='single').count()
+    return len(all_predictions), performance_stats, total_confidence, batch_count, single_count
+
+
+def stats_aggregate(user_id):
+    """One GROUP BY over the user's history, before the summary table replaced it"""
+    rows = db.session.query(
+        PredictionHistory.predicted_performance,
+        PredictionHistory.prediction_type,
+        db.func.count(PredictionHistory.id),
+        db.func.sum(PredictionHistory.confidence)
+    ).filter(PredictionHistory.user_id == user_id)\
+        .group_by(PredictionHistory.predicted_performance, PredictionHistory.prediction_type).all()
+    performance_stats = {'Excellent': 0, 'Good': 0, 'Average': 0, 'Poor': 0}
+    by_type = {}
+    total, confidence_sum = 0, 0.0
+    for performance, prediction_type, count, confidence in rows:
+        total += count
+        confidence_sum += confidence or 0.0
+        if performance in performance_stats:
+            performance_stats[performance] += count
+        by_type[prediction_type] = by_type.get(prediction_type, 0) + count
+    return total, performance_stats, confidence_sum, by_type.get('batch', 0), by_type.get('single', 0)
+
+
+def stats_summary_table(user_id):
+    """What the dashboard reads"""
+    stats = db.session.get(UserPredictionStats, user_id)
+    return (stats.total_predictions, stats.get_performance_stats(), stats.confidence_sum,
+            stats.batch_count, stats.single_count)
+
+
+def create_user(username):
+    user = User(username=username, email=f'{username}@example.com', password_hash='x',
+                first_name='Bench', last_name='User')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def fill(user_id, rows, single_every=10):
+    writer = PredictionHistoryWriter(db.session, 5000)
+    for i, row in enumerate(history_rows(user_id, rows)):
+        if i % single_every == 0:
+            row['prediction_type'] = 'single'
+        writer.add(**row)
+    writer.flush()
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user_id = create_user('bench')
+        fill(user_id, args.rows)
+        fill(create_user('other'), args.rows // 10)
+
+        print(f"rows: {args.rows:,}")
+        results = {}
+        for name, fn in [('load all rows', stats_orm), ('grouped aggregate', stats_aggregate),
+                         ('summary table', stats_summary_table)]:
+            start = time.perf_counter()
+            results[name] = fn(user_id)
+            elapsed = time.perf_counter() - start
+            db.session.expunge_all()
+
+            tracemalloc.start()
+            fn(user_id)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            db.session.expunge_all()
+            print(f"{name:<18} {elapsed:8.4f} s  {peak / 2**20:8.1f} MiB peak")
+
+        orm = results['load all rows']
+        for other in results.values():
+            assert orm[0] == other[0] and orm[1] == other[1] and orm[3:] == other[3:]
+            assert abs(orm[2] - other[2]) < 1e-6 * max(1, orm[2])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark history pagination (keyset vs OFFSET) and the streaming export.
+
+Fills a temporary SQLite database with --rows history rows for one user,
+then times fetching one 100-row page at increasing depths with the keyset
+cursor and with LIMIT/OFFSET, and streams the whole history through
+history.iter_history_export as NDJSON and CSV. Export time and peak traced
+Python memory are measured in separate runs; loading the history with
+.all() first is shown for comparison.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_history_api --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from flask import Flask
+
+from models import db
+from history import history_query, history_page, iter_history_export, encode_cursor
+from benchmarks.bench_dashboard_stats import create_user, fill
+
+
+def drain(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+def export_all_at_once(query, export_format):
+    """What an export without streaming looks like: every row loaded, then encoded"""
+    predictions = db.session.scalars(query).all()
+    return drain(iter_history_export(db.session, query, export_format)) if predictions else 0
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user_id = create_user('bench')
+        fill(user_id, args.rows)
+        query = history_query(user_id)
+
+        print(f"rows: {args.rows:,}")
+        print(f"{'depth':>9} {'keyset ms':>10} {'offset ms':>10}")
+        for depth in (0, args.rows // 10, args.rows // 2, args.rows - 100):
+            # Cursor of the row just before the page, as a client would hold it
+            anchor = db.session.scalars(query.offset(depth - 1).limit(1)).first() if depth else None
+            cursor = encode_cursor(anchor) if anchor else None
+
+            start = time.perf_counter()
+            page, _ = history_page(db.session, query, cursor, limit=100)
+            keyset = time.perf_counter() - start
+
+            start = time.perf_counter()
+            offset_page = db.session.scalars(query.offset(depth).limit(100)).all()
+            offset = time.perf_counter() - start
+            assert [p.id for p in page] == [p.id for p in offset_page]
+            db.session.expunge_all()
+            print(f"{depth:>9,} {keyset * 1e3:>10.2f} {offset * 1e3:>10.2f}")
+
+        print(f"{'export':<16} {'seconds':>8} {'rows/s':>10} {'MiB out':>8} {'peak MiB':>9}")
+        for name, fn in [
+            ('ndjson stream', lambda: drain(iter_history_export(db.session, query, 'ndjson'))),
+            ('csv stream', lambda: drain(iter_history_export(db.session, query, 'csv'))),
+            ('ndjson .all()', lambda: export_all_at_once(query, 'ndjson')),
+        ]:
+            elapsed, peak, size = measure(fn)
+            db.session.expunge_all()
+            print(f"{name:<16} {elapsed:>8.2f} {args.rows / elapsed:>10,.0f} {size / 2**20:>8.1f} "
+                  f"{peak / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
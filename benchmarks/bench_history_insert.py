@@ -0,0 +1,104 @@
+"""Benchmark persisting batch prediction history: ORM objects vs PredictionHistoryWriter.
+
+For each database and row count, writes the same rows once through the old
+path (one PredictionHistory object per row, db.session.add, a single commit)
+and once through PredictionHistoryWriter (chunked Core executemany INSERTs),
+reporting wall time and peak traced Python memory.
+
+Runs against a temporary SQLite file by default; pass --database-url to add
+other databases, e.g. a local PostgreSQL::
+
+    python -m benchmarks.bench_history_insert --rows 10000 100000 \\
+        --database-url postgresql://localhost/student_bench
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from flask import Flask
+
+from models import db, User, PredictionHistory, PredictionHistoryWriter
+
+
+def history_rows(user_id, n):
+    for i in range(n):
+        yield {
+            'user_id': user_id,
+            'student_name': f'Student {i}',
+            'predicted_performance': ('Poor', 'Average', 'Good', 'Excellent')[i % 4],
+            'confidence': 0.5 + (i % 50) / 100,
+            'previous_grades': 60.0 + i % 40,
+            'attendance_percentage': 70.0 + i % 30,
+            'study_hours_per_day': 1.0 + i % 8,
+            'extracurricular_activities': i % 6,
+            'interactiveness': bool(i % 2),
+            'practical_knowledge': 'Good',
+            'communication_skill': 'Moderate',
+            'projects_handled': i % 10,
+            'assignments_completed': i % 20,
+            'prediction_type': 'batch'
+        }
+
+
+def write_orm(user_id, n, chunk_size):
+    for row in history_rows(user_id, n):
+        db.session.add(PredictionHistory(**row))
+    db.session.commit()
+
+
+def write_bulk(user_id, n, chunk_size):
+    writer = PredictionHistoryWriter(db.session, chunk_size)
+    for row in history_rows(user_id, n):
+        writer.add(**row)
+    writer.flush()
+    db.session.commit()
+    assert writer.rows_written == n
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--database-url', action='append', default=[])
+    args = parser.parse_args()
+
+    sqlite_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    urls = [f'sqlite:///{sqlite_path}'] + args.database_url
+
+    print(f"{'database':<12} {'rows':>8} {'path':>6} {'seconds':>9} {'rows/s':>10} {'peak MiB':>9}")
+    for url in urls:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = url
+        db.init_app(app)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            user = User(username='bench', email='bench@example.com', password_hash='x',
+                        first_name='Bench', last_name='User')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+            for n in args.rows:
+                for name, fn in [('orm', write_orm), ('bulk', write_bulk)]:
+                    elapsed, peak = measure(fn, user_id, n, args.chunk_size)
+                    db.session.expunge_all()
+                    print(f"{db.engine.dialect.name:<12} {n:>8} {name:>6} {elapsed:>9.2f} "
+                          f"{n / elapsed:>10,.0f} {peak / 2**20:>9.1f}")
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
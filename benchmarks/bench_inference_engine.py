@@ -0,0 +1,66 @@
+"""Benchmark the compiled NumPy forest against scikit-learn's predict_proba.
+
+Both engines score the same feature rows (the sample class tiled up to the
+largest batch size) and the probabilities are checked for exact equality.
+The end-to-end single-student call (predict_with_confidence) is timed for each
+engine as well.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_inference_engine --sizes 1 100 100000
+"""
+import argparse
+import logging
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from benchmarks.bench_batch_predict import load_students
+
+
+def per_call(fn, budget=1.0):
+    """Median seconds per call, repeating for about `budget` seconds"""
+    timings = []
+    deadline = time.perf_counter() + budget
+    while not timings or (time.perf_counter() < deadline and len(timings) < 1000):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 100000])
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    model = StudentPerformanceModel(store=ModelStore(tempfile.mkdtemp()), inference_engine='compiled')
+    students = load_students(max(args.sizes))
+    features = model._prepare_feature_frame(students)
+
+    print(f"{'rows':>8} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for size in args.sizes:
+        batch = features.head(size)
+        expected = model.model.predict_proba(batch)
+        assert np.array_equal(model.compiled_forest.predict_proba(batch), expected)
+
+        sklearn_seconds = per_call(lambda: model.model.predict_proba(batch))
+        compiled_seconds = per_call(lambda: model.compiled_forest.predict_proba(batch))
+        print(f"{size:>8} {sklearn_seconds * 1e3:>11.3f} {compiled_seconds * 1e3:>12.3f} "
+              f"{sklearn_seconds / compiled_seconds:>7.1f}x")
+
+    student_data = students.iloc[0].to_dict()
+    for engine in StudentPerformanceModel.INFERENCE_ENGINES:
+        model.inference_engine = engine
+        seconds = per_call(lambda: model.predict_with_confidence(student_data))
+        print(f"predict_with_confidence ({engine}): {seconds * 1e3:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
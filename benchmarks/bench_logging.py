@@ -0,0 +1,121 @@
+"""Benchmark request throughput per logging configuration.
+
+Each configuration runs in a fresh interpreter, against a scratch database
+and model store: --threads threads send logged-in /api/predict_single
+requests through the test client for --seconds, and the requests per
+second, the p99 latency and the log volume are reported. Each request
+writes one access line. stderr goes to a file, and then to a pipe read
+4 KiB at a time every --slow-sink-ms, standing in for a log collector that
+falls behind. 'DEBUG text, inline' is closest to the previous
+logging.basicConfig(level=logging.DEBUG).
+
+Run from the repository root::
+
+    python -m benchmarks.bench_logging --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CONFIGURATIONS = [
+    ('DEBUG text, inline', dict(LOG_LEVEL='DEBUG', LOG_FORMAT='text', LOG_QUEUE='0')),
+    ('INFO text, inline', dict(LOG_LEVEL='INFO', LOG_FORMAT='text', LOG_QUEUE='0')),
+    ('INFO json, inline', dict(LOG_LEVEL='INFO', LOG_FORMAT='json', LOG_QUEUE='0')),
+    ('INFO json, queue', dict(LOG_LEVEL='INFO', LOG_FORMAT='json', LOG_QUEUE='1')),
+]
+
+SNIPPET = '''
+import json, sys, threading, time
+import numpy as np
+import app as appmod
+appmod.model_holder.get()
+threads, seconds = int(sys.argv[1]), float(sys.argv[2])
+student = {
+    'student_name': 'A', 'previous_grades': 80, 'attendance': 90, 'study_hours': 6,
+    'extracurricular_activities': 3, 'interactiveness': 'yes', 'practical_knowledge': 'Good',
+    'communication_skill': 'Good', 'projects_handled': 4, 'assignments_completed': 18
+}
+stop = threading.Event()
+latencies = [[] for _ in range(threads)]
+
+def send(slot):
+    client = appmod.app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    while not stop.is_set():
+        start = time.perf_counter()
+        assert client.post('/api/predict_single', json=student).status_code == 200
+        latencies[slot].append(time.perf_counter() - start)
+
+workers = [threading.Thread(target=send, args=(slot,)) for slot in range(threads)]
+for worker in workers:
+    worker.start()
+time.sleep(seconds)
+stop.set()
+for worker in workers:
+    worker.join()
+done = [latency for slot in latencies for latency in slot]
+print(json.dumps({'rate': len(done) / seconds, 'p99': float(np.percentile(done, 99))}))
+'''
+
+
+def drain_slowly(pipe, delay, counter):
+    while True:
+        data = os.read(pipe.fileno(), 4096)
+        if not data:
+            return
+        counter[0] += len(data)
+        time.sleep(delay)
+
+
+def run(env, workdir, args, slow_sink_ms=None):
+    log_path = os.path.join(workdir, 'stderr.log')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               MODEL_STORE_DIR=os.path.join(workdir, 'model_store'), PYTHONWARNINGS='ignore', **env)
+    command = [sys.executable, '-c', SNIPPET, str(args.threads), str(args.seconds)]
+    if slow_sink_ms is None:
+        with open(log_path, 'w') as log:
+            output = subprocess.run(command, env=env, check=True, stdout=subprocess.PIPE,
+                                    stderr=log, text=True).stdout
+        log_bytes = os.path.getsize(log_path)
+    else:
+        process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        counter = [0]
+        reader = threading.Thread(target=drain_slowly, args=(process.stderr, slow_sink_ms / 1000, counter))
+        reader.start()
+        output = process.stdout.read().decode()
+        process.wait()
+        reader.join()
+        log_bytes = counter[0]
+    result = json.loads(output.strip().splitlines()[-1])
+    result['log_bytes'] = log_bytes
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--slow-sink-ms', type=float, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        run({'MODEL_WARMUP': 'eager'}, workdir, argparse.Namespace(threads=1, seconds=0.1))  # build the store
+
+        print(f"{args.threads} threads, {args.seconds:g} s each")
+        print(f"{'stderr':<10} {'logging':<22} {'requests/s':>11} {'p99 ms':>8} {'log bytes/request':>18}")
+        for sink, slow_sink_ms in [('file', None), ('slow pipe', args.slow_sink_ms)]:
+            for name, env in CONFIGURATIONS:
+                result = run(env, workdir, args, slow_sink_ms)
+                per_request = result['log_bytes'] / (result['rate'] * args.seconds)
+                print(f"{sink:<10} {name:<22} {result['rate']:>11,.0f} {result['p99'] * 1e3:>8.2f} "
+                      f"{per_request:>18,.0f}")
+
+
+if __name__ == '__main__':
+    main()
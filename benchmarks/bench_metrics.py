@@ -0,0 +1,159 @@
+"""Benchmark the cost of the /metrics instrumentation.
+
+Times the metric primitives on their own, then runs --rounds rounds of
+--requests logged-in /api/predict_single requests (prediction cache
+disabled) and --batches 30-student /api/predict_batch uploads, with the
+instrumentation on and with every timer and counter swapped for a no-op,
+and reports the median per-request latency of each. Runs against a scratch
+database and model store.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_metrics --requests 500
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import statistics
+import tempfile
+import time
+import timeit
+import warnings
+
+STUDENT = {
+    'student_name': 'A', 'previous_grades': 80, 'attendance': 90, 'study_hours': 6,
+    'extracurricular_activities': 3, 'interactiveness': 'yes', 'practical_knowledge': 'Good',
+    'communication_skill': 'Good', 'projects_handled': 4, 'assignments_completed': 18
+}
+BATCH_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'sample_data', 'large_class_30_students.xlsx')
+
+
+class NullMetric:
+    """Stands in for a metric child, or a labelled metric, and records nothing"""
+
+    def labels(self, *values):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def time(self):
+        return contextlib.nullcontext()
+
+
+def primitives():
+    from metrics import MetricsRegistry
+    registry = MetricsRegistry()
+    counter = registry.counter('bench_total', 'bench').labels()
+    histogram = registry.histogram('bench_seconds', 'bench', ('stage',)).labels('x')
+
+    def timed():
+        with histogram.time():
+            pass
+    number = 200000
+    for name, fn in [('Counter.inc', counter.inc), ('Histogram.observe', lambda: histogram.observe(0.003)),
+                     ('with Histogram.time()', timed)]:
+        seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{name:<24} {seconds * 1e6:>6.2f} us")
+
+
+def swap(modules, null):
+    """Replace every instrumentation hook with `null`; returns the originals"""
+    app, ml_model, models = modules
+    saved = {
+        'stages': dict(app.STAGE_SECONDS), 'rows': dict(app.ROWS), 'errors': dict(app.ROW_ERRORS),
+        'http': app.HTTP_REQUEST_SECONDS, 'history': models._HISTORY_WRITE_SECONDS,
+        'model': [dict(d) for d in (ml_model._PREPARE_SECONDS, ml_model._INFERENCE_SECONDS,
+                                    ml_model._SUGGESTIONS_SECONDS)],
+    }
+    for hooks in (app.STAGE_SECONDS, app.ROWS, app.ROW_ERRORS, ml_model._PREPARE_SECONDS,
+                  ml_model._INFERENCE_SECONDS, ml_model._SUGGESTIONS_SECONDS):
+        for key in hooks:
+            hooks[key] = null
+    app.HTTP_REQUEST_SECONDS = null
+    models._HISTORY_WRITE_SECONDS = null
+    return saved
+
+
+def restore(modules, saved):
+    app, ml_model, models = modules
+    app.STAGE_SECONDS.update(saved['stages'])
+    app.ROWS.update(saved['rows'])
+    app.ROW_ERRORS.update(saved['errors'])
+    app.HTTP_REQUEST_SECONDS = saved['http']
+    models._HISTORY_WRITE_SECONDS = saved['history']
+    for hooks, original in zip((ml_model._PREPARE_SECONDS, ml_model._INFERENCE_SECONDS,
+                                ml_model._SUGGESTIONS_SECONDS), saved['model']):
+        hooks.update(original)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                      MODEL_STORE_DIR=os.path.join(workdir, 'model_store'),
+                      MODEL_WARMUP='eager', PREDICTION_CACHE_SIZE='0')
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    import app
+    import ml_model
+    import models
+    modules = (app, ml_model, models)
+
+    primitives()
+
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    with open(BATCH_FILE, 'rb') as f:
+        upload = f.read()
+
+    def single():
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            assert client.post('/api/predict_single', json=STUDENT).status_code == 200
+        return (time.perf_counter() - start) / args.requests
+
+    def batch():
+        start = time.perf_counter()
+        for _ in range(args.batches):
+            response = client.post('/api/predict_batch', content_type='multipart/form-data',
+                                   data={'file': (io.BytesIO(upload), 'students.xlsx')})
+            assert response.status_code == 200
+        return (time.perf_counter() - start) / args.batches
+
+    single(), batch()  # warm up
+    samples = {(name, on): [] for name in ('single', 'batch') for on in (True, False)}
+    for round_number in range(args.rounds):
+        # Alternate which goes first, as the history table grows throughout
+        for on in ((True, False) if round_number % 2 else (False, True)):
+            saved = None if on else swap(modules, NullMetric())
+            samples['single', on].append(single())
+            samples['batch', on].append(batch())
+            if saved is not None:
+                restore(modules, saved)
+
+    print(f"{'request':<20} {'metrics off ms':>15} {'metrics on ms':>14} {'overhead':>9}")
+    for name in ('single', 'batch'):
+        off = statistics.median(samples[name, False])
+        on = statistics.median(samples[name, True])
+        print(f"{name:<20} {off * 1e3:>15.3f} {on * 1e3:>14.3f} {(on - off) / off:>9.1%}")
+
+    start = time.perf_counter()
+    body = client.get('/metrics').get_data()
+    print(f"/metrics scrape: {(time.perf_counter() - start) * 1e3:.2f} ms, {len(body):,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark model hot-reload across gunicorn workers.
+
+Builds two model versions in a scratch model store, starts gunicorn
+(--workers x --threads, MODEL_RELOAD_INTERVAL=--interval) on a scratch
+database, and sends logged-in /api/predict_single requests from
+--concurrency threads for --seconds. For the second half of the run the
+registry's CURRENT file is pointed at the other version every --swap-every
+seconds, as a deploy would. A poller reads /api/model_info every 20 ms.
+
+Reports the requests that failed, the p50/p99 latency without and with
+swaps, and how long after each swap a worker last answered with the old
+version (the time until every worker had converged).
+
+Run from the repository root (needs gunicorn)::
+
+    python -m benchmarks.bench_model_reload --seconds 30
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+import warnings
+
+import numpy as np
+
+from benchmarks.load_test import HttpClient, login, single_payloads, start_gunicorn
+
+
+def build_versions(workdir):
+    """Store the default model and a 150-tree variant; returns both versions"""
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_model import StudentPerformanceModel
+    from model_store import ModelStore
+    from retraining import _synthetic_split
+
+    model = StudentPerformanceModel(store=ModelStore(os.path.join(workdir, 'model_store')))
+    X_train, X_test, y_train, y_test = _synthetic_split(model)
+    forest = RandomForestClassifier(n_estimators=150, random_state=7).fit(X_train, y_train)
+    # Recorded as derived from the default model, like a retrained one, so the registry accepts it
+    variant = model.with_forest(forest, dict(model.training_config, retrain={'parent': model.version,
+                                                                             'n_estimators': 150}),
+                                forest.score(X_test, y_test))
+    return model.store, [model.version, variant.version]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--swap-every', type=float, default=3)
+    parser.add_argument('--interval', type=float, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    workdir = tempfile.mkdtemp(prefix='bench_model_reload_')
+    store, versions = build_versions(workdir)
+    store.set_current(versions[0])
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               MODEL_STORE_DIR=store.root, MODEL_RELOAD_INTERVAL=str(args.interval), LOG_LEVEL='WARNING')
+    # Create the schema and the demo user before the workers start
+    os.environ.update(env, MODEL_WARMUP='lazy', MODEL_RELOAD_INTERVAL='0')
+    import app  # noqa: F401
+    server, base_url = start_gunicorn(args, env)
+
+    try:
+        payloads = single_payloads(1000)
+        clients = [login(HttpClient(base_url)) for _ in range(args.concurrency)]
+        stop = threading.Event()
+        requests = []  # (start, latency, status)
+        observed = []  # (time, version)
+        lock = threading.Lock()
+
+        def send(client, offset):
+            i = offset
+            while not stop.is_set():
+                start = time.perf_counter()
+                status = client.request('POST', '/api/predict_single', json_body=payloads[i % len(payloads)])
+                with lock:
+                    requests.append((start, time.perf_counter() - start, status))
+                i += len(clients)
+
+        def poll():
+            while not stop.is_set():
+                with urllib.request.urlopen(base_url + '/api/model_info', timeout=60) as response:
+                    version = json.loads(response.read())['version']
+                observed.append((time.perf_counter(), version))
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=send, args=(client, n)) for n, client in enumerate(clients)]
+        threads.append(threading.Thread(target=poll))
+        for thread in threads:
+            thread.start()
+
+        begin = time.perf_counter()
+        time.sleep(args.seconds / 2)
+        swaps_from = time.perf_counter()
+        swaps = []  # (time, version swapped out)
+        old, new = versions
+        while time.perf_counter() - begin < args.seconds:
+            swaps.append((time.perf_counter(), old))
+            store.set_current(new)
+            old, new = new, old
+            time.sleep(args.swap_every)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    failed = sum(1 for _, _, status in requests if status != 200)
+    print(f"{args.workers} workers x {args.threads} threads, {args.concurrency} clients, "
+          f"reload interval {args.interval:g} s, {len(swaps)} swaps")
+    print(f"requests: {len(requests):,}, failed: {failed}")
+    print(f"{'phase':<12} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for phase, selected in [('no swaps', [r for r in requests if r[0] < swaps_from]),
+                            ('with swaps', [r for r in requests if r[0] >= swaps_from])]:
+        latencies = [latency for _, latency, _ in selected]
+        print(f"{phase:<12} {len(latencies):>9,} {np.percentile(latencies, 50) * 1e3:>8.1f} "
+              f"{np.percentile(latencies, 99) * 1e3:>8.1f}")
+
+    convergence = []
+    for at, old in swaps:
+        stale = [t - at for t, version in observed if t >= at and version == old and t - at < args.swap_every]
+        convergence.append(max(stale, default=0.0))
+    print(f"converged after: median {statistics.median(convergence):.2f} s, max {max(convergence):.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark login throughput and prediction latency under a login storm.
+
+--login-threads threads verify a password in a loop for --seconds while one
+thread runs single predictions back to back (prediction cache disabled).
+Verification runs inline on each login thread, as /login used to, or on a
+passwords.PasswordHasher pool of --workers threads, for the default scrypt
+method and for the cheaper methods given with --method. Reports logins per
+second and the prediction p50/p99. Also checks rehash detection.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_password_hashing --seconds 10
+"""
+import argparse
+import logging
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from passwords import PasswordHasher
+from benchmarks.bench_batch_predict import load_students
+
+
+def storm(verify, password_hash, model, student_data, login_threads, seconds):
+    stop = threading.Event()
+    logins = [0] * login_threads
+    latencies = []
+
+    def login(slot):
+        while not stop.is_set():
+            assert verify(password_hash, 'correct horse')
+            logins[slot] += 1
+
+    def predict():
+        while not stop.is_set():
+            start = time.perf_counter()
+            model.predict_with_confidence(student_data)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=login, args=(slot,)) for slot in range(login_threads)]
+    threads.append(threading.Thread(target=predict))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(logins) / seconds, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--method', action='append', default=None,
+                        help="extra Werkzeug hash methods to run on the pool (repeatable)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    model = StudentPerformanceModel(store=ModelStore(tempfile.mkdtemp()), cache_size=0)
+    student_data = load_students(1).iloc[0].to_dict()
+
+    start = time.perf_counter()
+    for _ in range(50):
+        model.predict_with_confidence(student_data)
+    print(f"prediction alone: {(time.perf_counter() - start) / 50 * 1e3:.2f} ms")
+
+    print(f"{args.login_threads} login threads, {args.seconds:g} s each")
+    print(f"{'verification':<34} {'logins/s':>9} {'predict p50 ms':>15} {'predict p99 ms':>15}")
+    runs = [('inline, scrypt', 'scrypt', None)]
+    for method in ['scrypt'] + (args.method or ['scrypt:16384:8:1', 'pbkdf2:sha256:100000']):
+        runs.append((f"pool of {args.workers}, {method}", method, args.workers))
+    for name, method, workers in runs:
+        password_hash = generate_password_hash('correct horse', method=method)
+        if workers is None:
+            verify = check_password_hash
+            hasher = None
+        else:
+            hasher = PasswordHasher(method=method, workers=workers, max_pending=args.login_threads)
+            verify = hasher.verify
+        rate, p50, p99 = storm(verify, password_hash, model, student_data, args.login_threads, args.seconds)
+        print(f"{name:<34} {rate:>9.1f} {p50 * 1e3:>15.2f} {p99 * 1e3:>15.2f}")
+        if hasher is not None:
+            hasher.close()
+
+    hasher = PasswordHasher(method='pbkdf2:sha256:100000', workers=1)
+    assert hasher.needs_rehash(generate_password_hash('x', method='scrypt'))
+    assert not hasher.needs_rehash(hasher.hash('x'))
+    hasher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the prediction cache on repeated single predictions and duplicate-heavy batches.
+
+Single: the same student is predicted repeatedly with the cache disabled and
+enabled (after the first call every lookup is a hit). Batch: the sample class
+tiled to --rows rows (30 distinct profiles), --rows distinct random students
+(more than the cache holds, so the cache is bypassed) and half a cache's
+worth of distinct students, each predicted with the cache disabled, cold and
+warm (best of three).
+
+Run from the repository root::
+
+    python -m benchmarks.bench_prediction_cache --rows 100000
+"""
+import argparse
+import logging
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from benchmarks.bench_batch_predict import load_students
+from benchmarks.bench_inference_engine import per_call
+
+
+def random_students(rows, seed=0):
+    """Distinct random students in the sample file's value ranges"""
+    students = load_students(rows)
+    rng = np.random.default_rng(seed)
+    students['Previous_Grades'] = rng.uniform(30, 100, rows).round(2)
+    students['Attendance_Percentage'] = rng.uniform(40, 100, rows).round(2)
+    return students
+
+
+def timed(fn, setup=None, repeat=3):
+    """Best wall time of `repeat` calls, running `setup` untimed before each"""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--cache-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    store = ModelStore(tempfile.mkdtemp())
+    uncached = StudentPerformanceModel(store=store, cache_size=0)
+    cached = StudentPerformanceModel(store=store, cache_size=args.cache_size)
+
+    student_data = load_students(1).iloc[0].to_dict()
+    print(f"single, cache off: {per_call(lambda: uncached.predict_with_confidence(student_data)) * 1e3:.3f} ms")
+    print(f"single, cache hit: {per_call(lambda: cached.predict_with_confidence(student_data)) * 1e3:.3f} ms")
+
+    small = args.cache_size // 2
+    for name, students in (('sample class tiled', load_students(args.rows)),
+                           ('distinct students', random_students(args.rows)),
+                           ('distinct students', random_students(small))):
+        off = timed(lambda: uncached.predict_batch(students))
+        cold = timed(lambda: cached.predict_batch(students), setup=cached.prediction_cache.clear)
+        warm = timed(lambda: cached.predict_batch(students))
+        print(f"{name} ({len(students)} rows): off {off:.2f} s, cold {cold:.2f} s, warm {warm:.2f} s")
+
+    print(cached.prediction_cache.stats())
+
+
+if __name__ == '__main__':
+    main()
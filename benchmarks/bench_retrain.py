@@ -0,0 +1,119 @@
+"""Benchmark retraining on prediction history: streamed warm start vs full refit.
+
+Seeds a scratch SQLite database with --rows prediction history rows (new
+synthetic students, labelled with the model's own predictions), then in a
+fresh process per mode either
+
+* stream: retraining.retrain over retraining.iter_history_chunks, adding
+  --trees-per-chunk trees per --chunk-size rows to the stored forest, or
+* full: reads the whole history into one DataFrame and fits a new forest
+  with as many trees on it plus the synthetic training split,
+
+and reports the time, rows per second, accuracy on the synthetic test split
+and peak RSS.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_retrain --rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SNIPPET = '''
+import json, logging, sys, time, warnings
+logging.disable(logging.CRITICAL)
+warnings.simplefilter('ignore')
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from retraining import iter_history_chunks, retrain, _labelled_features, _synthetic_split
+
+db_path, store_dir, mode, chunk_size, trees_per_chunk = sys.argv[1:6]
+chunk_size, trees_per_chunk = int(chunk_size), int(trees_per_chunk)
+model = StudentPerformanceModel(store=ModelStore(store_dir))
+session = Session(create_engine(f"sqlite:///{db_path}"))
+start = time.perf_counter()
+if mode == 'stream':
+    retrained = retrain(model, iter_history_chunks(session, chunk_size), trees_per_chunk=trees_per_chunk,
+                        max_trees=10 ** 6)
+    stats = retrained.training_stats
+    rows, accuracy, trees = stats['rows'], stats['accuracy'], stats['trees']
+else:
+    history = pd.concat(list(iter_history_chunks(session, 10 ** 9)))
+    X_history, y_history = _labelled_features(model, history)
+    X_train, X_test, y_train, y_test = _synthetic_split(model)
+    trees = len(model.model.estimators_) + trees_per_chunk * -(-len(history) // chunk_size)
+    forest = RandomForestClassifier(n_estimators=trees, random_state=42)
+    forest.fit(pd.concat([X_history, X_train]), np.concatenate([y_history, y_train]))
+    rows, accuracy = len(history), accuracy_score(y_test, forest.predict(X_test))
+seconds = time.perf_counter() - start
+# VmHWM is reset by exec, unlike ru_maxrss which can carry over the parent's peak
+with open('/proc/self/status') as status:
+    rss = next(int(line.split()[1]) for line in status if line.startswith('VmHWM')) / 1024
+print(json.dumps({'rows': rows, 'seconds': seconds, 'accuracy': accuracy, 'trees': trees, 'rss': rss,
+                  'parent_accuracy': model.accuracy}))
+'''
+
+
+def seed_history(db_path, store_dir, rows):
+    """Fill a scratch database with `rows` predictions of new synthetic students"""
+    import logging
+    import warnings
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    from sqlalchemy import create_engine
+    from ml_model import StudentPerformanceModel
+    from model_store import ModelStore
+    from models import db
+
+    model = StudentPerformanceModel(store=ModelStore(store_dir))
+    students = model._generate_training_data(n_samples=rows, seed=7).drop(columns='Performance')
+    for column in model.CATEGORICAL_COLUMNS:
+        students[column] = students[column].astype(str)
+    predicted = model.predict_batch(students)
+    history = students.rename(columns=str.lower).assign(
+        user_id=1, student_name='Student', predicted_performance=predicted['Prediction'],
+        confidence=predicted['Confidence'], interactiveness=students['Interactiveness'].astype(bool),
+        prediction_type='batch'
+    )
+    engine = create_engine(f"sqlite:///{db_path}")
+    db.metadata.create_all(engine)
+    history.to_sql('prediction_history', engine, if_exists='append', index=False, chunksize=10000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--trees-per-chunk', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'bench.db')
+    store_dir = os.path.join(workdir, 'model_store')
+    seed_history(db_path, store_dir, args.rows)
+
+    print(f"{'mode':<7} {'rows':>8} {'trees':>6} {'seconds':>8} {'rows/s':>8} {'accuracy':>9} {'peak RSS MiB':>13}")
+    for mode in ['stream', 'full']:
+        output = subprocess.run(
+            [sys.executable, '-c', SNIPPET, db_path, store_dir, mode, str(args.chunk_size),
+             str(args.trees_per_chunk)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<7} {result['rows']:>8} {result['trees']:>6} {result['seconds']:>8.2f} "
+              f"{result['rows'] / result['seconds']:>8,.0f} {result['accuracy']:>9.3f} {result['rss']:>13.0f}")
+    print(f"accuracy before retraining: {result['parent_accuracy']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark multi-core scaling of batch prediction and training.
+
+For each worker count the same batch is predicted with forest threads
+(n_jobs) and with the sharded process pool (predict_processes), and the forest
+is refitted with n_jobs threads. Predictions are checked against the
+single-threaded run. The input is sample_data/large_class_30_students.xlsx
+tiled up to --rows rows.
+
+The app hands the model one upload chunk (BATCH_CHUNK_SIZE rows) at a
+time, so the process pool is also timed predicting the batch in chunks of
+each --chunk-sizes size, every chunk sharded, against predicting the same
+chunks in-process.
+
+Only meaningful on a host with at least as many cores as the largest worker
+count; with fewer, the tables show the overhead of threads and processes
+and nothing else, and a warning is printed.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_scaling --rows 200000 --workers 1 2 4 8
+"""
+import argparse
+import logging
+import os
+import platform
+import tempfile
+import time
+import warnings
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from benchmarks.bench_batch_predict import load_students
+
+
+def timed(fn, repeat):
+    """Best wall time of `repeat` calls, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='worker counts to try (default: powers of two up to the core count)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    # Cores this process may run on, which can be fewer than the host has
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    workers = args.workers or [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= cores]
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    store = ModelStore(tempfile.mkdtemp())
+    students = load_students(args.rows)
+    baseline = StudentPerformanceModel(store=store).predict_batch(students)
+
+    host = ' '.join(filter(None, [platform.machine(), platform.processor(), platform.system(), platform.release()]))
+    print(f"rows: {args.rows}, cores: {cores}, host: {host}, Python {platform.python_version()}")
+    if max(workers) > cores:
+        print(f"warning: {max(workers)} workers on {cores} cores; these numbers only show overhead "
+              f"and must not be used to size machines")
+    print(f"{'workers':>7} {'threads rows/s':>15} {'processes rows/s':>17} {'fit s':>7}")
+    for n in workers:
+        threaded = StudentPerformanceModel(store=store, n_jobs=n)
+        thread_seconds, result = timed(lambda: threaded.predict_batch(students), args.repeat)
+        assert list(result['Prediction']) == list(baseline['Prediction'])
+
+        sharded = StudentPerformanceModel(store=store, predict_processes=n, shard_min_rows=1)
+        try:
+            if n > 1:
+                sharded.predict_batch(students.head(n))  # start the pool outside the timing
+            process_seconds, result = timed(lambda: sharded.predict_batch(students), args.repeat)
+            assert list(result['Prediction']) == list(baseline['Prediction'])
+        finally:
+            sharded.close()
+
+        fit_seconds, _ = timed(threaded._fit_from_scratch, 1)
+
+        print(f"{n:>7} {args.rows / thread_seconds:>15,.0f} {args.rows / process_seconds:>17,.0f} "
+              f"{fit_seconds:>7.2f}")
+
+    def in_chunks(model, chunk_size):
+        return [model.predict_batch(students.iloc[start:start + chunk_size])
+                for start in range(0, len(students), chunk_size)]
+
+    print()
+    print(f"{'chunk rows':>10} {'processes':>9} {'in-process rows/s':>18} {'sharded rows/s':>15}")
+    local = StudentPerformanceModel(store=store)
+    for chunk_size in args.chunk_sizes:
+        local_seconds, _ = timed(lambda: in_chunks(local, chunk_size), args.repeat)
+        for n in [n for n in workers if n > 1]:
+            sharded = StudentPerformanceModel(store=store, predict_processes=n, shard_min_rows=1)
+            try:
+                sharded.predict_batch(students.head(n))  # start the pool outside the timing
+                process_seconds, _ = timed(lambda: in_chunks(sharded, chunk_size), args.repeat)
+            finally:
+                sharded.close()
+            print(f"{chunk_size:>10,} {n:>9} {args.rows / local_seconds:>18,.0f} "
+                  f"{args.rows / process_seconds:>15,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Latency micro-benchmark for single-student prediction.
+
+Compares the old two-pass flow used by /api/predict_single
+(predict + suggestions, then get_prediction_confidence) with
+StudentPerformanceModel.predict_with_confidence, and reports p50/p99 per call.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_single_latency --requests 1000
+"""
+import argparse
+import logging
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+
+STUDENT = {
+    'Previous_Grades': 78.0,
+    'Attendance_Percentage': 86.0,
+    'Study_Hours_Per_Day': 4.5,
+    'Extracurricular_Activities': 2,
+    'Interactiveness': 1,
+    'Practical_Knowledge': 'Good',
+    'Communication_Skill': 'Moderate',
+    'Projects_Handled': 3,
+    'Assignments_Completed': 16
+}
+
+
+def legacy_request(model, student_data):
+    """Old endpoint flow: predict() for the label, predict_proba() for the confidence"""
+    features = model._prepare_features(student_data)
+    prediction = model.model.predict(features)[0]
+    suggestions = model._generate_suggestions(student_data, prediction)
+    confidence = model.get_prediction_confidence(student_data)
+    return prediction, confidence, suggestions
+
+
+def combined_request(model, student_data):
+    return model.predict_with_confidence(student_data)
+
+
+def percentiles(fn, model, n):
+    fn(model, STUDENT)  # warm up
+    samples = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        fn(model, STUDENT)
+        samples[i] = time.perf_counter() - start
+    return np.percentile(samples, [50, 99]) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--store', default=None, help='model store directory (default: temporary)')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    model = StudentPerformanceModel(store=ModelStore(args.store or tempfile.mkdtemp()))
+    assert legacy_request(model, STUDENT) == combined_request(model, STUDENT)
+
+    print(f"{'flow':<26} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, fn in [('predict + confidence', legacy_request),
+                     ('predict_with_confidence', combined_request)]:
+        p50, p99 = percentiles(fn, model, args.requests)
+        print(f"{name:<26} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark model startup: training from scratch vs loading the stored artifact.
+
+Each measurement runs in a fresh interpreter so import costs are included,
+the same way a gunicorn worker pays them on boot.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup --repeat 3
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SNIPPET = '''
+import json, sys, time
+start = time.perf_counter()
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+imported = time.perf_counter()
+store = ModelStore(sys.argv[1]) if sys.argv[1] else None
+model = StudentPerformanceModel(store=store)
+ready = time.perf_counter()
+print(json.dumps({'import': imported - start, 'model': ready - imported}))
+'''
+
+
+def run(store_dir):
+    output = subprocess.run(
+        [sys.executable, '-c', SNIPPET, store_dir],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        scenarios = [
+            ('no store (train every start)', lambda: run('')),
+            ('store miss (train + save)', lambda: run(tempfile.mkdtemp(dir=store_dir))),
+            ('store hit (load artifact)', lambda: run(store_dir)),
+        ]
+        run(store_dir)  # populate the artifact used by the "store hit" runs
+
+        print(f"{'scenario':<32} {'import s':>9} {'model s':>9}")
+        for name, fn in scenarios:
+            samples = [fn() for _ in range(args.repeat)]
+            print(f"{name:<32} "
+                  f"{statistics.median(s['import'] for s in samples):>9.3f} "
+                  f"{statistics.median(s['model'] for s in samples):>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark streaming vs whole-file ingestion of batch uploads.
+
+Generates a CSV (and optionally an .xlsx) by tiling
+sample_data/large_class_30_students.xlsx, then in a fresh process per run
+either reads the whole file and predicts it at once, or reads and predicts it
+chunk by chunk with batch_ingest.iter_upload_chunks. Reports time to the first
+predicted chunk, total time and peak RSS.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_stream_ingest --rows 500000
+    python -m benchmarks.bench_stream_ingest --rows 100000 --xlsx
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_FILE = 'sample_data/large_class_30_students.xlsx'
+
+SNIPPET = '''
+import json, logging, sys, time, warnings
+logging.disable(logging.CRITICAL)
+warnings.simplefilter('ignore')
+import pandas as pd
+from ml_model import StudentPerformanceModel
+from model_store import ModelStore
+from batch_ingest import iter_upload_chunks
+
+path, mode, store_dir, chunk_size = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+model = StudentPerformanceModel(store=ModelStore(store_dir))
+
+def frame(df):
+    students = df[StudentPerformanceModel.INPUT_COLUMNS].copy()
+    students['Interactiveness'] = (df['Interactiveness'].astype(str).str.lower() == 'yes').astype(int)
+    return students
+
+start = time.perf_counter()
+first = None
+rows = 0
+if mode == 'whole':
+    df = pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path)
+    rows = len(model.predict_batch(frame(df)))
+    first = time.perf_counter() - start
+else:
+    with open(path, 'rb') as handle:
+        for chunk in iter_upload_chunks(handle, path, chunk_size):
+            rows += len(model.predict_batch(frame(chunk)))
+            if first is None:
+                first = time.perf_counter() - start
+total = time.perf_counter() - start
+# VmHWM is reset by exec, unlike ru_maxrss which can carry over the parent's peak
+with open('/proc/self/status') as status:
+    rss = next(int(line.split()[1]) for line in status if line.startswith('VmHWM')) / 1024
+print(json.dumps({'rows': rows, 'first': first, 'total': total, 'rss': rss}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--xlsx', action='store_true', help='also benchmark an .xlsx upload')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    store_dir = os.path.join(workdir, 'model_store')
+    df = pd.read_excel(SAMPLE_FILE)
+    df = df.iloc[np.arange(args.rows) % len(df)].reset_index(drop=True)
+
+    paths = [os.path.join(workdir, 'upload.csv')]
+    df.to_csv(paths[0], index=False)
+    if args.xlsx:
+        paths.append(os.path.join(workdir, 'upload.xlsx'))
+        df.to_excel(paths[1], index=False)
+    del df
+
+    print(f"{'file':<6} {'mode':<7} {'rows':>8} {'first s':>8} {'total s':>8} {'peak RSS MiB':>13}")
+    for path in paths:
+        for mode in ['whole', 'stream']:
+            output = subprocess.run(
+                [sys.executable, '-c', SNIPPET, path, mode, store_dir, str(args.chunk_size)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{os.path.splitext(path)[1][1:]:<6} {mode:<7} {result['rows']:>8} "
+                  f"{result['first']:>8.2f} {result['total']:>8.2f} {result['rss']:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
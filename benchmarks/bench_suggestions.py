@@ -0,0 +1,120 @@
+"""Benchmark the suggestion rule table: row-by-row if/elif chain vs boolean masks.
+
+--rows distinct random students get random predictions. Suggestions are
+computed with the original per-student if/elif chain, with
+suggestions.suggestion_ids row by row and with suggestions.batch_suggestion_ids
+over the whole DataFrame, and all three are checked to agree. Also reports
+the JSON size of the suggestions as texts vs ids plus the shared message list.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_suggestions --rows 100000
+"""
+import argparse
+import json
+
+import numpy as np
+
+from suggestions import SUGGESTION_MESSAGES, suggestion_ids, batch_suggestion_ids, suggestion_messages
+from benchmarks.bench_prediction_cache import random_students, timed
+
+
+def reference_suggestions(student_data, prediction):
+    """StudentPerformanceModel._generate_suggestions before the rule table"""
+    suggestions = []
+    if student_data['Previous_Grades'] < 60:
+        suggestions.append("Focus on improving foundational knowledge in weak subjects")
+        suggestions.append("Consider getting tutoring or joining study groups")
+    elif student_data['Previous_Grades'] < 80:
+        suggestions.append("Review and strengthen concepts in subjects with lower grades")
+    if student_data['Attendance_Percentage'] < 75:
+        suggestions.append("Improve class attendance - aim for at least 85% attendance")
+        suggestions.append("Catch up on missed lectures through recordings or notes")
+    elif student_data['Attendance_Percentage'] < 85:
+        suggestions.append("Maintain consistent attendance to stay engaged with coursework")
+    if student_data['Study_Hours_Per_Day'] < 3:
+        suggestions.append("Increase daily study time to at least 3-4 hours")
+        suggestions.append("Create a structured study schedule and stick to it")
+    elif student_data['Study_Hours_Per_Day'] < 5:
+        suggestions.append("Optimize study time with focused, distraction-free sessions")
+    if student_data['Extracurricular_Activities'] < 2:
+        suggestions.append("Participate in more extracurricular activities to develop well-rounded skills")
+    elif student_data['Extracurricular_Activities'] > 5:
+        suggestions.append("Balance extracurricular activities with academic commitments")
+    if student_data['Interactiveness'] == 0:
+        suggestions.append("Increase participation in class discussions and Q&A sessions")
+        suggestions.append("Ask questions when concepts are unclear")
+    if student_data['Practical_Knowledge'] in ['Poor', 'Moderate']:
+        suggestions.append("Focus on hands-on practice and practical applications")
+        suggestions.append("Seek internships or project-based learning opportunities")
+    if student_data['Communication_Skill'] in ['Poor', 'Moderate']:
+        suggestions.append("Work on improving communication skills through presentations and group work")
+        suggestions.append("Consider joining debate clubs or public speaking groups")
+    if student_data['Projects_Handled'] < 3:
+        suggestions.append("Take on more project work to gain practical experience")
+        suggestions.append("Collaborate on group projects to learn teamwork skills")
+    if student_data['Assignments_Completed'] < 15:
+        suggestions.append("Complete all assigned work on time")
+        suggestions.append("Use assignment feedback to improve future submissions")
+    if prediction == 'Poor':
+        suggestions.append("Consider meeting with academic advisors for personalized support")
+        suggestions.append("Explore additional resources like learning centers or peer tutoring")
+    elif prediction == 'Average':
+        suggestions.append("Focus on consistency in all areas to move to the next level")
+        suggestions.append("Identify your strongest subjects and leverage them")
+    elif prediction == 'Good':
+        suggestions.append("Push yourself with advanced coursework or leadership roles")
+        suggestions.append("Mentor struggling students to reinforce your own learning")
+    else:
+        suggestions.append("Continue your excellent work and consider research opportunities")
+        suggestions.append("Share your study strategies with peers")
+    return list(dict.fromkeys(suggestions))[:8]
+
+
+def random_population(rows, seed=0):
+    """random_students with every rule threshold crossed by some rows"""
+    students = random_students(rows, seed)
+    rng = np.random.default_rng(seed + 1)
+    students['Study_Hours_Per_Day'] = rng.uniform(0, 8, rows).round(1)
+    students['Extracurricular_Activities'] = rng.integers(0, 8, rows)
+    students['Interactiveness'] = rng.integers(0, 2, rows)
+    students['Projects_Handled'] = rng.integers(0, 6, rows)
+    students['Assignments_Completed'] = rng.integers(5, 25, rows)
+    students['Practical_Knowledge'] = rng.choice(['Poor', 'Moderate', 'Good', 'Very Good'], rows)
+    students['Communication_Skill'] = rng.choice(['Poor', 'Moderate', 'Good', 'Very Good'], rows)
+    predictions = rng.choice(['Poor', 'Average', 'Good', 'Excellent'], rows)
+    return students, predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    students, predictions = random_population(args.rows)
+    records = students.to_dict('records')
+    results = {}
+
+    def run(name, fn):
+        results[name] = fn()
+        elapsed = timed(fn, repeat=3)
+        print(f"{name:<22} {elapsed:8.3f} s  {args.rows / elapsed:>12,.0f} rows/s")
+        return elapsed
+
+    print(f"rows: {args.rows:,}")
+    chain = run('if/elif chain', lambda: [reference_suggestions(r, p) for r, p in zip(records, predictions)])
+    run('rule table, per row', lambda: [suggestion_ids(r, p) for r, p in zip(records, predictions)])
+    masks = run('rule table, masks', lambda: batch_suggestion_ids(students, predictions))
+    print(f"speedup of masks over the chain: {chain / masks:.1f}x")
+
+    expected = results['if/elif chain']
+    assert [suggestion_messages(ids) for ids in results['rule table, per row']] == expected
+    assert [suggestion_messages(ids) for ids in results['rule table, masks']] == expected
+
+    texts = len(json.dumps(expected))
+    ids = len(json.dumps([list(ids) for ids in results['rule table, masks']])) + len(json.dumps(SUGGESTION_MESSAGES))
+    print(f"JSON suggestions: texts {texts / 2**20:.1f} MiB, ids + messages {ids / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""Benchmark the synthetic training-data generator.
+
+Compares the vectorized ``StudentPerformanceModel._generate_training_data``
+against the original per-row loop (kept below as a reference) on wall time
+and peak traced memory, and prints the class balance and feature means of
+both so the outputs can be checked for statistical equivalence.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_training_data
+    python -m benchmarks.bench_training_data --sizes 5000 100000 1000000 --loop-max 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from ml_model import StudentPerformanceModel
+
+
+def legacy_generate_training_data(n_samples=5000):
+    """Generate comprehensive synthetic training data for the model with realistic patterns"""
+    np.random.seed(42)
+    
+    data = []
+    
+    for i in range(n_samples):
+        # Create diverse student profiles with realistic patterns
+        
+        # Define different student archetypes for more realistic data - balanced distribution
+        archetype = np.random.choice(['poor', 'average', 'good', 'excellent', 'inconsistent'], 
+                                    p=[0.15, 0.30, 0.35, 0.15, 0.05])
+        
+        if archetype == 'poor':
+            # Poor: Score < 50 (Grades < 60, Attendance < 70%, Study < 2 hrs/day)
+            base_performance = np.random.uniform(0, 0.50)
+            variance = 0.10
+        elif archetype == 'average':
+            # Average: Score 50-70 (Grades 60-75, Attendance 70-80%, Study 2-5 hrs/day)
+            base_performance = np.random.uniform(0.50, 0.70)
+            variance = 0.08
+        elif archetype == 'good':
+            # Good: Score 70-85 (Grades 75-90, Attendance 80-92%, Study 5-8 hrs/day)
+            base_performance = np.random.uniform(0.70, 0.85)
+            variance = 0.07
+        elif archetype == 'excellent':
+            # Excellent: Score > 85 (Grades 85-100, Attendance 90-100%, Study 6+ hrs/day)
+            base_performance = np.random.uniform(0.85, 1.0)
+            variance = 0.05
+        else:  # inconsistent
+            base_performance = np.random.uniform(0.30, 0.75)
+            variance = 0.18
+        
+        # Previous grades with realistic distribution aligned to performance levels
+        # Poor: <60, Average: 60-75, Good: 75-90, Excellent: 85-100
+        if archetype == 'poor':
+            previous_grades = np.clip(np.random.normal(50, 8), 0, 59)
+        elif archetype == 'average':
+            previous_grades = np.clip(np.random.normal(67, 6), 60, 75)
+        elif archetype == 'good':
+            previous_grades = np.clip(np.random.normal(82, 5), 75, 90)
+        elif archetype == 'excellent':
+            previous_grades = np.clip(np.random.normal(92, 4), 85, 100)
+        else:  # inconsistent
+            previous_grades = np.clip(np.random.normal(base_performance * 85 + 15, variance * 100), 0, 100)
+        
+        # Attendance aligned to performance levels
+        # Poor: <70%, Average: 70-80%, Good: 80-92%, Excellent: 90-100%
+        attendance_correlation = 0.95 if np.random.random() > 0.1 else 0.85
+        if archetype == 'poor':
+            attendance = np.clip(np.random.normal(60, 8), 0, 69)
+        elif archetype == 'average':
+            attendance = np.clip(np.random.normal(75, 4), 70, 80)
+        elif archetype == 'good':
+            attendance = np.clip(np.random.normal(86, 4), 80, 92)
+        elif archetype == 'excellent':
+            attendance = np.clip(np.random.normal(95, 3), 90, 100)
+        else:  # inconsistent
+            attendance = np.clip(np.random.normal(base_performance * 80 + 20, variance * 80), 0, 100)
+        
+        # Study hours aligned to performance levels
+        # Poor: <2 hrs/day, Average: 2-5 hrs/day, Good: 5-8 hrs/day, Excellent: 6+ hrs/day
+        if archetype == 'poor':
+            study_hours = np.clip(np.random.gamma(2, 0.8), 0, 2)
+        elif archetype == 'average':
+            study_hours = np.clip(np.random.normal(3.5, 0.8), 2, 5)
+        elif archetype == 'good':
+            study_hours = np.clip(np.random.normal(6.5, 0.9), 5, 8)
+        elif archetype == 'excellent':
+            study_hours = np.clip(np.random.gamma(3.5, 2.2), 6, 12)
+        else:  # inconsistent
+            base_study = base_performance * 7 + 1
+            study_hours = np.clip(
+                np.random.gamma(base_study * 0.5, 2) if base_study > 3 else np.random.exponential(base_study),
+                0, 15
+            )
+        
+        # Extracurricular activities - balanced distribution
+        if base_performance > 0.7:
+            extracurricular = np.random.choice([2, 3, 4, 5, 6], p=[0.1, 0.25, 0.35, 0.2, 0.1])
+        elif base_performance > 0.4:
+            extracurricular = np.random.choice([1, 2, 3, 4], p=[0.2, 0.4, 0.3, 0.1])
+        else:
+            extracurricular = np.random.choice([0, 1, 2, 3], p=[0.3, 0.4, 0.2, 0.1])
+        
+        # Interactiveness with realistic probability
+        interactiveness_prob = base_performance * 0.7 + 0.15 + (np.random.random() * 0.1 - 0.05)
+        interactiveness = 1 if np.random.random() < interactiveness_prob else 0
+        
+        # Practical knowledge with independent variation
+        practical_score = base_performance + np.random.normal(0, 0.15)
+        if practical_score < 0.20:
+            practical_knowledge = 'Poor'
+        elif practical_score < 0.45:
+            practical_knowledge = 'Moderate'
+        elif practical_score < 0.75:
+            practical_knowledge = 'Good'
+        else:
+            practical_knowledge = 'Very Good'
+        
+        # Communication skill with independent variation
+        comm_score = base_performance + np.random.normal(0, 0.18)
+        if comm_score < 0.25:
+            communication_skill = 'Poor'
+        elif comm_score < 0.50:
+            communication_skill = 'Moderate'
+        elif comm_score < 0.75:
+            communication_skill = 'Good'
+        else:
+            communication_skill = 'Very Good'
+        
+        # Projects handled - correlated with skills and time
+        project_base = base_performance * 5 + 1
+        projects = int(np.clip(
+            np.random.poisson(project_base) + np.random.choice([-1, 0, 1], p=[0.1, 0.7, 0.2]),
+            0, 15
+        ))
+        
+        # Assignments completed - high correlation with discipline
+        assignment_rate = base_performance * 0.85 + 0.10
+        assignments = int(np.clip(
+            np.random.binomial(20, assignment_rate),
+            0, 20
+        ))
+        
+        # Calculate performance with weighted combination and realistic thresholds
+        # Encode categorical for calculation
+        practical_encoded_val = {'Poor': 0, 'Moderate': 1, 'Good': 2, 'Very Good': 3}[practical_knowledge]
+        comm_encoded_val = {'Poor': 0, 'Moderate': 1, 'Good': 2, 'Very Good': 3}[communication_skill]
+        
+        # Improved scoring formula that scales to 100
+        performance_score = (
+            previous_grades * 0.35 +                           # Max: 35 points
+            attendance * 0.25 +                                 # Max: 25 points
+            min(study_hours / 12 * 100, 100) * 0.15 +          # Max: 15 points (normalize study hours)
+            min(extracurricular / 6 * 100, 100) * 0.08 +       # Max: 8 points (normalize activities)
+            interactiveness * 100 * 0.05 +                      # Max: 5 points
+            (practical_encoded_val / 3 * 100) * 0.07 +         # Max: 7 points
+            (comm_encoded_val / 3 * 100) * 0.05                # Max: 5 points
+        )
+        # Total max possible: 100 points
+        
+        # Add minimal random noise
+        performance_score += np.random.normal(0, 1.5)
+        
+        # Determine performance category with realistic boundaries
+        # Poor: < 50, Average: 50-70, Good: 70-85, Excellent: >= 85
+        if performance_score < 50:
+            performance = 'Poor'
+        elif performance_score < 70:
+            performance = 'Average'
+        elif performance_score < 85:
+            performance = 'Good'
+        else:
+            performance = 'Excellent'
+        
+        # Add edge cases and special scenarios (5% of data)
+        if i % 20 == 0:
+            # High grades but poor attendance
+            if np.random.random() < 0.3:
+                attendance = np.random.uniform(40, 65)
+            # High study hours but low grades (inefficient studying)
+            elif np.random.random() < 0.3:
+                study_hours = np.random.uniform(8, 12)
+                previous_grades = np.random.uniform(50, 70)
+            # Perfect attendance but struggling
+            elif np.random.random() < 0.3:
+                attendance = np.random.uniform(95, 100)
+                previous_grades = np.random.uniform(40, 60)
+        
+        data.append({
+            'Previous_Grades': round(previous_grades, 2),
+            'Attendance_Percentage': round(attendance, 2),
+            'Study_Hours_Per_Day': round(study_hours, 2),
+            'Extracurricular_Activities': extracurricular,
+            'Interactiveness': interactiveness,
+            'Practical_Knowledge': practical_knowledge,
+            'Communication_Skill': communication_skill,
+            'Projects_Handled': projects,
+            'Assignments_Completed': assignments,
+            'Performance': performance
+        })
+    
+    return pd.DataFrame(data)
+
+
+def measure(fn, *args):
+    """Return (result, seconds, peak_bytes) for fn.
+
+    Wall time and peak memory come from separate calls because tracemalloc
+    slows down allocation-heavy Python loops considerably.
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def summarize(df):
+    """Class balance and numeric feature means used to compare generators."""
+    summary = df['Performance'].value_counts(normalize=True).round(3).to_dict()
+    for column in ['Previous_Grades', 'Attendance_Percentage', 'Study_Hours_Per_Day',
+                   'Extracurricular_Activities', 'Interactiveness',
+                   'Projects_Handled', 'Assignments_Completed']:
+        summary[column] = round(float(df[column].mean()), 2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 50000, 1000000])
+    parser.add_argument('--loop-max', type=int, default=50000,
+                        help='largest size to run the legacy loop on')
+    args = parser.parse_args()
+
+    # The generator only needs performance_categories, so skip training
+    model = StudentPerformanceModel.__new__(StudentPerformanceModel)
+    model.performance_categories = ['Poor', 'Average', 'Good', 'Excellent']
+
+    print(f"{'n_samples':>10} {'impl':>10} {'seconds':>10} {'peak MiB':>10}")
+    for n in args.sizes:
+        runs = [('vectorized', model._generate_training_data)]
+        if n <= args.loop_max:
+            runs.append(('loop', legacy_generate_training_data))
+        summaries = {}
+        for name, fn in runs:
+            df, elapsed, peak = measure(fn, n)
+            summaries[name] = summarize(df)
+            print(f"{n:>10} {name:>10} {elapsed:>10.3f} {peak / 2**20:>10.1f}")
+        if len(summaries) == 2:
+            print(pd.DataFrame(summaries).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Load test the cached Flask-Login user loader.
+
+A minimal Flask app on a temporary SQLite database with --users users and a
+login_required endpoint that reads current_user. --requests requests spread
+round-robin over the logged-in users are sent from --threads threads with
+load_user querying the users table directly (the old loader) and through
+user_cache.UserCache; every SELECT on users is counted. Also checks that
+updating a user's role and deactivating a user are visible on the next request.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_user_cache --requests 20000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from flask import Flask, jsonify
+from flask_login import LoginManager, current_user, login_required, login_user
+from sqlalchemy import event
+
+from models import db, User
+from user_cache import UserCache
+from benchmarks.bench_dashboard_stats import create_user
+
+
+def create_app(cached, users):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'bench'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    db.init_app(app)
+    login_manager = LoginManager(app)
+    user_cache = UserCache(db.session)
+    state = {'user_selects': 0, 'user_cache': user_cache}
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        if cached:
+            return user_cache.load(int(user_id))
+        return User.query.get(int(user_id))
+
+    @app.route('/login/<int:user_id>')
+    def login(user_id):
+        login_user(db.session.get(User, user_id))
+        return 'ok'
+
+    @app.route('/whoami')
+    @login_required
+    def whoami():
+        return jsonify({'id': current_user.id, 'role': current_user.role, 'active': current_user.active_status,
+                        'name': current_user.get_full_name()})
+
+    with app.app_context():
+        db.create_all()
+        state['user_ids'] = [create_user(f'user{i}') for i in range(users)]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_user_selects(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('SELECT') and 'FROM users' in statement:
+                state['user_selects'] += 1
+
+    return app, state
+
+
+def run(app, state, requests, threads):
+    clients = []
+    for user_id in state['user_ids']:
+        client = app.test_client()
+        client.get(f'/login/{user_id}')
+        clients.append(client)
+    state['user_selects'] = 0
+
+    def worker(offset):
+        for i in range(offset, requests, threads):
+            response = clients[i % len(clients)].get('/whoami')
+            assert response.status_code == 200
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, clients
+
+
+def check_invalidation(app, clients, user_id):
+    client = clients[0]
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.role = 'teacher'
+        db.session.commit()
+    assert client.get('/whoami').json['role'] == 'teacher'
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.active_status = False
+        db.session.commit()
+    assert client.get('/whoami').json['active'] is False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"requests: {args.requests:,}, users: {args.users}, threads: {args.threads}")
+    for name, cached in (('query per request', False), ('UserCache', True)):
+        app, state = create_app(cached, args.users)
+        elapsed, clients = run(app, state, args.requests, args.threads)
+        selects = state['user_selects']
+        print(f"{name:<18} {args.requests / elapsed:>8,.0f} req/s  {selects:>7,} user SELECTs "
+              f"({selects / elapsed:,.0f}/s)")
+        if cached:
+            print(state['user_cache'].stats())
+            check_invalidation(app, clients, state['user_ids'][0])
+            print("role update and deactivation seen on the next request")
+
+
+if __name__ == '__main__':
+    main()
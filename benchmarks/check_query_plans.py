@@ -0,0 +1,125 @@
+"""Check that the per-user history queries use the prediction_history indexes.
+
+Creates the schema in a scratch database the way app.py does (db.create_all
+followed by run_migrations), fills in some history, then runs EXPLAIN QUERY
+PLAN (SQLite) or EXPLAIN (PostgreSQL, with sequential scans disabled so the
+tiny table doesn't hide a missing index) for the dashboard queries and
+asserts that each one is answered from the expected index. Also upgrades a
+copy of an existing database created before the indexes (--legacy-db,
+default: the bundled instance database) and checks they were added, and
+that the dropped ones are gone. Exits
+non-zero on failure.
+
+The repository has no test suite, so nothing runs this automatically: run
+it by hand, or as a CI step, after changing models.py, migrations.py or
+the dashboard and history queries.
+
+Run from the repository root::
+
+    python -m benchmarks.check_query_plans
+    python -m benchmarks.check_query_plans --database-url postgresql://localhost/student_bench
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import create_engine, inspect, text
+
+from models import db, PredictionHistory
+from migrations import run_migrations
+from history import history_query, after_cursor, encode_cursor
+from benchmarks.bench_dashboard_stats import create_user, fill
+
+INDEXES = {'ix_prediction_history_user_created'}
+# Added by an earlier migration and dropped by a later one
+DROPPED_INDEXES = {'ix_prediction_history_user_type'}
+
+
+def dashboard_queries(user_id):
+    """(description, query, expected index) for the dashboard and history API queries"""
+    return [
+        ('recent predictions',
+         PredictionHistory.query.filter_by(user_id=user_id)
+         .order_by(PredictionHistory.created_at.desc(), PredictionHistory.id.desc()).limit(10),
+         'ix_prediction_history_user_created'),
+        ('history page after cursor',
+         history_page_query(user_id),
+         'ix_prediction_history_user_created'),
+    ]
+
+
+def history_page_query(user_id):
+    """The statement history_page runs for a page deep into a filtered history"""
+    cursor = encode_cursor(PredictionHistory(id=100, created_at=datetime(2025, 1, 1)))
+    return after_cursor(history_query(user_id, prediction_type=['batch']), cursor).limit(101)
+
+
+def explain(query):
+    statement = getattr(query, 'statement', query).compile(db.engine, compile_kwargs={'literal_binds': True})
+    if db.engine.dialect.name == 'sqlite':
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all()
+        return '\n'.join(row[-1] for row in rows)
+    db.session.execute(text("SET enable_seqscan = off"))
+    return '\n'.join(row[0] for row in db.session.execute(text(f"EXPLAIN {statement}")))
+
+
+def check_plans(url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    db.init_app(app)
+    failures = 0
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        run_migrations(db.engine)
+        user_id = create_user('bench')
+        fill(user_id, 20000)
+        fill(create_user('other'), 20000)
+
+        for description, query, expected in dashboard_queries(user_id):
+            plan = explain(query)
+            uses = [name for name in INDEXES if name in plan]
+            ok = (expected in uses) if expected else bool(uses)
+            failures += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {db.engine.dialect.name} {description}: "
+                  f"{', '.join(uses) or 'no index'}")
+            if not ok:
+                print('    ' + plan.replace('\n', '\n    '))
+        db.session.rollback()
+        db.drop_all()
+    return failures
+
+
+def check_legacy_migration(path):
+    scratch = os.path.join(tempfile.mkdtemp(), 'legacy.db')
+    shutil.copy(path, scratch)
+    engine = create_engine(f'sqlite:///{scratch}')
+    before = {index['name'] for index in inspect(engine).get_indexes('prediction_history')}
+    db.metadata.create_all(engine)
+    applied = run_migrations(engine)
+    after = {index['name'] for index in inspect(create_engine(f'sqlite:///{scratch}')).get_indexes('prediction_history')}
+    ok = INDEXES <= after and not DROPPED_INDEXES & after and not run_migrations(engine)
+    print(f"[{'ok' if ok else 'FAIL'}] migrating {path}: applied {applied}, "
+          f"indexes {sorted(before)} -> {sorted(after)}")
+    return not ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', action='append', default=[])
+    parser.add_argument('--legacy-db', default='instance/student_performance.db')
+    args = parser.parse_args()
+
+    urls = [f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"] + args.database_url
+    failures = sum(check_plans(url) for url in urls)
+    if os.path.exists(args.legacy_db):
+        failures += check_legacy_migration(args.legacy_db)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+"""End-to-end load test of the web app, in-process or over HTTP against gunicorn.
+
+Scenarios: /login, /api/predict_single with distinct random students,
+/api/predict_batch with generated workbooks of each --batch-rows size, and
+/dashboard for a user with --history-rows seeded predictions. Each scenario
+reports requests, errors, throughput, p50/p95/p99 latency and the peak RSS
+of the serving processes while it ran (Linux: VmHWM, reset between
+scenarios through /proc/<pid>/clear_refs). Results are printed as JSON and
+written to --output.
+
+--target inprocess drives the app through Flask's test client from
+--concurrency threads. --target http starts gunicorn (--workers,
+--threads) on a scratch database and model store, or uses a server that is
+already running at --url (nothing is seeded then, and RSS is not measured).
+
+With --baseline, every scenario is compared against the stored results and
+the run fails (exit status 1) when throughput drops or p95 latency or peak
+RSS grows by more than --threshold, or when any request fails.
+--save-baseline writes the results as the new baseline. Results record the
+host (cores, CPU, memory, OS, Python); comparing against a baseline from a
+different host prints a warning, as its numbers don't carry over.
+
+Run from the repository root::
+
+    python -m benchmarks.load_test --baseline benchmarks/baselines/load_test_inprocess.json
+    python -m benchmarks.load_test --target http --workers 2
+"""
+import argparse
+import http.cookiejar
+import io
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+import warnings
+
+import numpy as np
+import pandas as pd
+
+CREDENTIALS = {'username': 'demo', 'password': 'demo123'}
+CATEGORIES = ['Poor', 'Moderate', 'Good', 'Very Good']
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def random_students(rows, seed=0):
+    """Distinct random students as upload columns"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Student_Name': [f'Student {i}' for i in range(rows)],
+        'Previous_Grades': rng.uniform(30, 100, rows).round(2),
+        'Attendance_Percentage': rng.uniform(40, 100, rows).round(2),
+        'Study_Hours_Per_Day': rng.uniform(0, 8, rows).round(1),
+        'Extracurricular_Activities': rng.integers(0, 8, rows),
+        'Interactiveness': rng.choice(['Yes', 'No'], rows),
+        'Practical_Knowledge': rng.choice(CATEGORIES, rows),
+        'Communication_Skill': rng.choice(CATEGORIES, rows),
+        'Projects_Handled': rng.integers(0, 6, rows),
+        'Assignments_Completed': rng.integers(5, 25, rows),
+    })
+
+
+def single_payloads(n, seed=1):
+    """/api/predict_single bodies for n distinct students"""
+    students = random_students(n, seed)
+    return [{
+        'student_name': row.Student_Name,
+        'previous_grades': row.Previous_Grades,
+        'attendance': row.Attendance_Percentage,
+        'study_hours': row.Study_Hours_Per_Day,
+        'extracurricular_activities': int(row.Extracurricular_Activities),
+        'interactiveness': row.Interactiveness.lower(),
+        'practical_knowledge': row.Practical_Knowledge,
+        'communication_skill': row.Communication_Skill,
+        'projects_handled': int(row.Projects_Handled),
+        'assignments_completed': int(row.Assignments_Completed),
+    } for row in students.itertuples()]
+
+
+def workbook(rows, workdir):
+    """Path of a generated .xlsx upload with `rows` students, written once"""
+    path = os.path.join(workdir, f'students_{rows}.xlsx')
+    if not os.path.exists(path):
+        random_students(rows, seed=rows).to_excel(path, index=False)
+    return path
+
+
+class InProcessClient:
+    """Requests through Flask's test client; one per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+
+    def fresh(self):
+        return InProcessClient(self.app)
+
+    def request(self, method, path, json_body=None, upload=None):
+        kwargs = {}
+        if json_body is not None:
+            kwargs['json'] = json_body
+        if upload is not None:
+            name, content = upload
+            kwargs.update(content_type='multipart/form-data', data={'file': (io.BytesIO(content), name)})
+        response = self.client.open(path, method=method, **kwargs)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """Requests over HTTP with a cookie jar for the login session; one per thread"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def fresh(self):
+        return HttpClient(self.base_url)
+
+    def request(self, method, path, json_body=None, upload=None):
+        headers, body = {}, None
+        if json_body is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(json_body).encode()
+        if upload is not None:
+            name, content = upload
+            boundary = uuid.uuid4().hex
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+            body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+                    f'Content-Type: {XLSX_MIMETYPE}\r\n\r\n').encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request, timeout=600) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+def login(client):
+    status = client.request('POST', '/login', json_body=CREDENTIALS)
+    if status != 200:
+        raise RuntimeError(f"Login failed with status {status}")
+    return client
+
+
+def run_scenario(clients, requests, send):
+    """Send `requests` requests from one thread per client; latencies and wall time"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def work(client):
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            status = send(client, i)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not 200 <= status < 300:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=work, args=(client,)) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def reset_peak_rss(pids):
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            pass
+
+
+def peak_rss_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith('VmHWM'))
+        except (OSError, StopIteration):
+            return None
+    return total / 1024
+
+
+def summarize(latencies, errors, wall, rss, rows=None):
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1e3, 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1e3, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1e3, 3),
+        'peak_rss_mb': round(rss, 1) if rss is not None else None,
+    }
+    if rows is not None:
+        result['rows_per_s'] = round(rows * len(latencies) / wall, 1)
+    return result
+
+
+def host_details():
+    """The machine the numbers were measured on"""
+    memory_gb = None
+    try:
+        with open('/proc/meminfo') as meminfo:
+            memory_gb = round(int(next(line for line in meminfo if line.startswith('MemTotal')).split()[1])
+                              / 2 ** 20, 1)
+    except (OSError, StopIteration):
+        pass
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            cpu = next(line for line in cpuinfo if line.startswith('model name')).split(':', 1)[1].strip()
+    except (OSError, StopIteration):
+        pass
+    return {
+        'cores': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+        'cpu': cpu,
+        'memory_gb': memory_gb,
+        'os': f"{platform.system()} {platform.release()}",
+        'python': platform.python_version(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regressions of `results` against `baseline`, as messages"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        if current['errors']:
+            regressions.append(f"{name}: {current['errors']} failed requests")
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {current['throughput_rps']:.1f} req/s, "
+                               f"baseline {previous['throughput_rps']:.1f}")
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_ms']:.1f} ms, baseline {previous['p95_ms']:.1f}")
+        if (current['peak_rss_mb'] is not None and previous.get('peak_rss_mb') is not None
+                and current['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + threshold)):
+            regressions.append(f"{name}: peak RSS {current['peak_rss_mb']:.0f} MB, "
+                               f"baseline {previous['peak_rss_mb']:.0f}")
+    return regressions
+
+
+def seed_history(app_module, rows):
+    """Give the demo user `rows` prediction history rows"""
+    from models import db, User, PredictionHistoryWriter
+    from benchmarks.bench_history_insert import history_rows
+    with app_module.app.app_context():
+        user = User.query.filter_by(username=CREDENTIALS['username']).first()
+        writer = PredictionHistoryWriter(db.session, 5000)
+        for row in history_rows(user.id, rows):
+            writer.add(**row)
+        writer.flush()
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(args, env):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+         '--threads', str(args.threads), '--timeout', '600', 'main:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 180
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        try:
+            # Every worker has to have loaded the model; probe until each answered ready
+            if all(HttpClient(base_url).request('GET', '/readyz') == 200 for _ in range(args.workers * 4)):
+                return server, base_url
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def server_pids(server):
+    with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+        return [server.pid] + [int(pid) for pid in f.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=('inprocess', 'http'), default='inprocess')
+    parser.add_argument('--url', help="use a running server instead of starting gunicorn")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--login-requests', type=int, default=40)
+    parser.add_argument('--single-requests', type=int, default=1000)
+    parser.add_argument('--batch-rows', default='100,1000,10000,100000')
+    parser.add_argument('--batch-requests', type=int, default=3)
+    parser.add_argument('--dashboard-requests', type=int, default=500)
+    parser.add_argument('--history-rows', type=int, default=100000)
+    parser.add_argument('--output', help="write the results JSON here")
+    parser.add_argument('--baseline', help="fail on regressions against this results JSON")
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--save-baseline', help="write the results JSON here as the new baseline")
+    args = parser.parse_args()
+    batch_rows = [int(rows) for rows in args.batch_rows.split(',') if rows]
+
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+               MODEL_STORE_DIR=os.path.join(workdir, 'model_store'), LOG_LEVEL='WARNING')
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+
+    server, pids = None, []
+    if args.url is None:
+        # Create the schema, the demo user, the model artifact and the seeded history
+        os.environ.update(env, MODEL_WARMUP='eager' if args.target == 'inprocess' else 'lazy')
+        import app as app_module
+        seed_history(app_module, args.history_rows)
+    if args.target == 'inprocess':
+        base = InProcessClient(app_module.app)
+        pids = [os.getpid()]
+    elif args.url is None:
+        server, base_url = start_gunicorn(args, env)
+        base = HttpClient(base_url)
+        pids = server_pids(server)
+    else:
+        base = HttpClient(args.url)
+
+    uploads = {rows: (f'students_{rows}.xlsx', open(workbook(rows, workdir), 'rb').read()) for rows in batch_rows}
+    payloads = single_payloads(args.single_requests)
+    clients = [login(base.fresh()) for _ in range(args.concurrency)]
+
+    scenarios = [
+        ('login', [base] * args.concurrency, args.login_requests,
+         lambda client, i: client.fresh().request('POST', '/login', json_body=CREDENTIALS), None),
+        ('predict_single', clients, args.single_requests,
+         lambda client, i: client.request('POST', '/api/predict_single', json_body=payloads[i]), None),
+        ('dashboard', clients, args.dashboard_requests,
+         lambda client, i: client.request('GET', '/dashboard'), None),
+    ]
+    for rows in batch_rows:
+        scenarios.append((f'predict_batch_{rows}', clients[:1], args.batch_requests,
+                          lambda client, i, rows=rows: client.request('POST', '/api/predict_batch',
+                                                                      upload=uploads[rows]), rows))
+
+    results = {
+        'target': args.target,
+        'host': host_details(),
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('output', 'baseline', 'save_baseline', 'threshold')},
+        'scenarios': {},
+    }
+    try:
+        for name, scenario_clients, requests, send, rows in scenarios:
+            reset_peak_rss(pids)
+            latencies, errors, wall = run_scenario(scenario_clients, requests, send)
+            rss = peak_rss_mb(pids) if pids else None
+            results['scenarios'][name] = summarize(latencies, errors, wall, rss, rows)
+            print(f"{name}: {json.dumps(results['scenarios'][name])}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(output + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print(f"warning: {args.baseline} was recorded with different options", file=sys.stderr)
+        if baseline.get('host') != results['host']:
+            print(f"warning: {args.baseline} was recorded on a different host: {baseline.get('host')}",
+                  file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import numpy as np
+
+# Rows traversed together; bounds the (rows x trees) working arrays
+BLOCK_ROWS = 2048
+
+
+class CompiledForest:
+    """A fitted RandomForestClassifier flattened into plain NumPy arrays.
+
+    All trees share one set of node arrays and tree t starts at node
+    roots[t]. Leaves point back at themselves, so every tree can be walked
+    for max_depth steps at once without tracking which rows have finished.
+
+    predict_proba reproduces scikit-learn bit for bit: inputs are cast to
+    float32 like sklearn's input validation does, a row goes left when its
+    value is <= the float64 threshold (NaN goes where the node sends missing
+    values), and the per-tree leaf probabilities are summed in tree order
+    before dividing by the number of trees, as the single-threaded forest
+    does.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, values, roots, max_depth,
+                 classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.values = values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features = n_features
+
+    @classmethod
+    def from_estimator(cls, forest):
+        """Export the trees of a fitted RandomForestClassifier"""
+        features, thresholds, children, missing_left, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            # children[node] is (left, right) as global node ids
+            children.append(np.stack([
+                np.where(leaf, nodes, tree.children_left),
+                np.where(leaf, nodes, tree.children_right)
+            ], axis=1) + offset)
+            missing_left.append(tree.missing_go_to_left.astype(bool))
+            # Leaf values already hold class fractions (scikit-learn >= 1.4)
+            values.append(tree.value[:, 0, :])
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children).astype(np.intp),
+            missing_left=np.concatenate(missing_left),
+            values=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+            classes=forest.classes_,
+            n_features=forest.n_features_in_
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict_proba(self, X):
+        """Class probabilities for a 2-D array or DataFrame of feature rows"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+
+        proba = np.empty((len(X), self.values.shape[1]))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            proba[start:start + len(block)] = self._predict_block(block)
+        return proba
+
+    def _predict_block(self, X):
+        leaves = self.apply(X)
+        # Running sum over trees in order (accumulate is strictly sequential), like
+        # RandomForestClassifier adding each tree's probabilities into one array
+        totals = np.add.accumulate(self.values[leaves], axis=1)[:, -1]
+        return totals / self.n_trees
+
+    def apply(self, X):
+        """Global leaf node id reached in every tree, shape (rows, trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        flat = X.ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, np.newaxis]
+        has_missing = np.isnan(flat).any()
+
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            values = flat[row_offsets + self.feature[nodes]]
+            go_right = ~(values <= self.threshold[nodes])
+            if has_missing:
+                go_right &= ~(np.isnan(values) & self.missing_left[nodes])
+            nodes = self.children[nodes, go_right.view(np.int8)]
+        return nodes
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
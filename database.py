@@ -0,0 +1,60 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SQLITE_JOURNAL_MODES = ('delete', 'truncate', 'persist', 'memory', 'wal', 'off')
+SQLITE_SYNCHRONOUS = ('off', 'normal', 'full', 'extra')
+
+
+def normalize_database_url(url):
+    """Accept the postgres:// scheme some hosts still hand out"""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=300):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URL
+
+    Every backend gets pre-ping and recycling. Server databases get a
+    QueuePool of pool_size connections plus max_overflow extra under load,
+    per process: with N gunicorn workers keep N * (pool_size + max_overflow)
+    below the server's max_connections. SQLite keeps SQLAlchemy's default
+    pool.
+    """
+    options = {'pool_pre_ping': True, 'pool_recycle': pool_recycle}
+    backend = make_url(url).get_backend_name()
+    if backend != 'sqlite':
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+    return options
+
+
+def configure_sqlite(engine, journal_mode='wal', synchronous='normal', busy_timeout_ms=5000, mmap_size=0):
+    """Apply connection PRAGMAs to every new connection of a SQLite engine
+
+    WAL lets readers run alongside the single writer and makes commits
+    cheaper; synchronous=NORMAL is durable across application crashes in WAL
+    mode (only a power loss can drop the latest commits); busy_timeout makes
+    a writer wait for the lock instead of failing with "database is locked";
+    mmap_size > 0 reads the database through memory-mapped I/O. No-op for
+    other backends. An empty journal_mode or synchronous keeps SQLite's default.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    journal_mode, synchronous = journal_mode.lower(), synchronous.lower()
+    if journal_mode and journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unknown SQLite journal_mode: {journal_mode!r}")
+    if synchronous and synchronous not in SQLITE_SYNCHRONOUS:
+        raise ValueError(f"Unknown SQLite synchronous setting: {synchronous!r}")
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if journal_mode:
+                cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            if synchronous:
+                cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        finally:
+            cursor.close()
@@ -0,0 +1,126 @@
+import io
+import csv
+import json
+import base64
+from datetime import datetime, timezone
+
+from sqlalchemy import select, or_, and_
+
+from models import PredictionHistory
+
+# Column order of the CSV export, matching PredictionHistory.to_dict
+EXPORT_FIELDS = [
+    'id', 'student_name', 'predicted_performance', 'confidence',
+    'previous_grades', 'attendance_percentage', 'study_hours_per_day',
+    'extracurricular_activities', 'interactiveness', 'practical_knowledge',
+    'communication_skill', 'projects_handled', 'assignments_completed',
+    'prediction_type', 'created_at'
+]
+
+
+def parse_history_filters(args):
+    """Filters for history_query from request args; raises ValueError on bad input
+
+    performance and type may be repeated; start and end are ISO dates or
+    datetimes (UTC unless an offset is given), start inclusive, end exclusive.
+    """
+    filters = {
+        'performance': args.getlist('performance'),
+        'prediction_type': args.getlist('type'),
+        'start': None,
+        'end': None
+    }
+    for name in ('start', 'end'):
+        value = args.get(name)
+        if value:
+            try:
+                moment = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"Invalid {name} date: {value!r}")
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+            filters[name] = moment
+    return filters
+
+
+def history_query(user_id, performance=None, prediction_type=None, start=None, end=None):
+    """A user's predictions, newest first, ordered by (created_at, id)"""
+    query = select(PredictionHistory).where(PredictionHistory.user_id == user_id)
+    if performance:
+        query = query.where(PredictionHistory.predicted_performance.in_(performance))
+    if prediction_type:
+        query = query.where(PredictionHistory.prediction_type.in_(prediction_type))
+    if start is not None:
+        query = query.where(PredictionHistory.created_at >= start)
+    if end is not None:
+        query = query.where(PredictionHistory.created_at < end)
+    return query.order_by(PredictionHistory.created_at.desc(), PredictionHistory.id.desc())
+
+
+def encode_cursor(prediction):
+    """Opaque cursor pointing just past a prediction"""
+    payload = json.dumps([prediction.created_at.isoformat(), prediction.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, prediction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(prediction_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def after_cursor(query, cursor):
+    """Restrict a history_query to the rows after a cursor
+
+    Keyset pagination: the page starts after the cursor's (created_at, id),
+    so it is an index range scan however deep the page is.
+    """
+    created_at, prediction_id = decode_cursor(cursor)
+    # The redundant created_at <= bound lets the planner seek the index
+    # instead of filtering every newer row
+    return query.where(
+        PredictionHistory.created_at <= created_at,
+        or_(
+            PredictionHistory.created_at < created_at,
+            and_(PredictionHistory.created_at == created_at, PredictionHistory.id < prediction_id)
+        )
+    )
+
+
+def history_page(session, query, cursor=None, limit=100):
+    """One page of a history_query and the cursor of the next page (None on the last)"""
+    if cursor:
+        query = after_cursor(query, cursor)
+    predictions = session.scalars(query.limit(limit + 1)).all()
+    next_cursor = encode_cursor(predictions[limit - 1]) if len(predictions) > limit else None
+    return predictions[:limit], next_cursor
+
+
+def iter_history_export(session, query, export_format='ndjson', batch_size=1000):
+    """Yield a history_query as CSV or NDJSON text, batch_size rows at a time
+
+    Rows are fetched with yield_per (a server-side cursor where the driver
+    supports one); the session only holds weak references to unmodified
+    objects, so each batch is freed once it has been written and memory does
+    not grow with the number of rows exported.
+    """
+    result = session.scalars(query.execution_options(yield_per=batch_size))
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for partition in result.partitions():
+            writer.writerows(prediction.to_dict() for prediction in partition)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Header only: no rows matched
+            yield buffer.getvalue()
+    else:
+        for partition in result.partitions():
+            yield ''.join(json.dumps(prediction.to_dict()) + '\n' for prediction in partition)
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import logging
+import threading
+import traceback
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update, delete, or_, and_
+
+from models import db, BatchJob, PredictionHistoryWriter
+from batch_ingest import iter_upload_chunks, estimate_row_count, missing_columns
+from logging_config import request_id_var
+
+
+class BatchJobRunner:
+    """Runs batch-prediction jobs on a local thread pool.
+
+    Job state lives in the batch_jobs table and each job's results are
+    appended to an NDJSON file, so progress survives a restart: jobs that were
+    queued, or running in a process that stopped heart-beating, are picked up
+    again by recover() and resume after the last committed chunk. A job is
+    claimed with a conditional UPDATE, so when several workers recover at once
+    only one of them runs it. start_sweeper() repeats the recovery every few
+    seconds, so a job whose worker was killed is resumed without a restart,
+    and deletes finished jobs older than `retention` seconds.
+
+    Next to each results file, an index records the row number and byte
+    offset where every chunk's results start, so a page of results is read
+    by seeking instead of scanning the file from the top.
+
+    `process_chunk(df, history, performance_stats, user_id)` predicts one
+    chunk, queues its history rows on `history` and returns one result dict
+    per row. Uploads lacking any of `required_columns` fail the job.
+    """
+
+    def __init__(self, app, process_chunk, required_columns, jobs_dir, max_workers=2,
+                 chunk_size=1000, insert_chunk_size=1000, stale_after=300, retention=7 * 24 * 3600):
+        self.app = app
+        self.process_chunk = process_chunk
+        self.required_columns = required_columns
+        self.jobs_dir = jobs_dir
+        self.chunk_size = chunk_size
+        self.insert_chunk_size = insert_chunk_size
+        self.stale_after = timedelta(seconds=stale_after)
+        self.retention = timedelta(seconds=retention)
+        self._sweeper = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-job')
+
+    def submit(self, file, filename, user_id):
+        """Store an upload, record a queued job and schedule it. Returns the job"""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        upload_path = os.path.join(job_dir, 'upload' + os.path.splitext(filename.lower())[1])
+        file.save(upload_path)
+
+        job = BatchJob(
+            id=job_id,
+            user_id=user_id,
+            filename=filename,
+            upload_path=upload_path,
+            results_path=os.path.join(job_dir, 'results.ndjson'),
+            status='queued'
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self._executor.submit(self._run, job_id)
+        return job
+
+    def recover(self, all_queued=True):
+        """Re-schedule queued jobs and jobs whose worker stopped heart-beating
+
+        With all_queued False, queued jobs are only taken once they have
+        waited longer than stale_after, so the periodic sweep does not queue
+        a job a second time in the worker that is about to run it.
+        """
+        cutoff = datetime.utcnow() - self.stale_after
+        queued = BatchJob.status == 'queued'
+        if not all_queued:
+            queued = and_(queued, BatchJob.updated_at < cutoff)
+        jobs = BatchJob.query.filter(or_(
+            queued,
+            and_(BatchJob.status == 'running', BatchJob.updated_at < cutoff)
+        )).all()
+        for job in jobs:
+            logging.info(f"Recovering batch job {job.id} ({job.status}, {job.processed_rows} rows done)")
+            self._executor.submit(self._run, job.id)
+        return len(jobs)
+
+    def cleanup(self):
+        """Delete completed and failed jobs, with their files, once they are older than the retention"""
+        cutoff = datetime.utcnow() - self.retention
+        jobs = BatchJob.query.filter(
+            BatchJob.status.in_(('completed', 'failed')), BatchJob.finished_at < cutoff
+        ).all()
+        for job in jobs:
+            shutil.rmtree(os.path.dirname(job.upload_path), ignore_errors=True)
+        if jobs:
+            db.session.execute(delete(BatchJob).where(BatchJob.id.in_([job.id for job in jobs])))
+            db.session.commit()
+            logging.info(f"Deleted {len(jobs)} finished batch jobs")
+        return len(jobs)
+
+    def start_sweeper(self, interval=60):
+        """Run recover() and cleanup() every `interval` seconds on a daemon thread"""
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep, args=(interval,),
+                                             name='batch-job-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self, interval):
+        while True:
+            time.sleep(interval)
+            with self.app.app_context():
+                try:
+                    self.recover(all_queued=False)
+                    self.cleanup()
+                except Exception as e:
+                    logging.error(f"Error sweeping batch jobs: {str(e)}")
+                    db.session.rollback()
+
+    def read_results(self, job, offset=0, limit=500):
+        """Committed results of a job, from offset, at most limit of them"""
+        results = []
+        if not os.path.exists(job.results_path):
+            return results
+        end = min(offset + limit, job.processed_rows)
+        # Start from the last chunk that begins at or before offset
+        index = self._read_index(job.results_path)
+        position = bisect_right([row for row, _ in index], offset) - 1
+        row, byte_offset = index[position] if position >= 0 else (0, 0)
+        with open(job.results_path, 'rb') as handle:
+            handle.seek(byte_offset)
+            while row < end:
+                line = handle.readline()
+                if not line:
+                    break
+                if row >= offset:
+                    results.append(json.loads(line))
+                row += 1
+        return results
+
+    @staticmethod
+    def _index_path(results_path):
+        return results_path + '.index'
+
+    @classmethod
+    def _read_index(cls, results_path):
+        """(first row, byte offset) of each chunk in a results file"""
+        try:
+            with open(cls._index_path(results_path)) as handle:
+                return [tuple(int(field) for field in line.split()) for line in handle if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _claim(self, job_id):
+        """Atomically mark a job as running by this worker; False if someone else has it"""
+        cutoff = datetime.utcnow() - self.stale_after
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(BatchJob)
+            .where(BatchJob.id == job_id)
+            .where(or_(
+                BatchJob.status == 'queued',
+                and_(BatchJob.status == 'running', BatchJob.updated_at < cutoff)
+            ))
+            .values(status='running', worker_id=self.worker_id, updated_at=now,
+                    started_at=db.func.coalesce(BatchJob.started_at, now))
+        ).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def _run(self, job_id):
+        # The job's log lines carry its id as their correlation id
+        request_id_var.set(f"job-{job_id}")
+        with self.app.app_context():
+            try:
+                if not self._claim(job_id):
+                    return
+                self._process(db.session.get(BatchJob, job_id))
+            except Exception as e:
+                logging.error(f"Batch job {job_id} failed: {str(e)}")
+                logging.error(traceback.format_exc())
+                db.session.rollback()
+                db.session.execute(
+                    update(BatchJob).where(BatchJob.id == job_id).values(
+                        status='failed', error=str(e),
+                        finished_at=datetime.utcnow(), updated_at=datetime.utcnow()
+                    )
+                )
+                db.session.commit()
+
+    def _process(self, job):
+        if job.total_rows is None:
+            job.total_rows = estimate_row_count(job.upload_path, job.filename)
+            db.session.commit()
+
+        performance_stats = job.get_performance_stats()
+        done = job.processed_rows or 0
+        self._truncate_results(job.results_path, done)
+
+        with open(job.upload_path, 'rb') as upload, open(job.results_path, 'ab') as results_file, \
+                open(self._index_path(job.results_path), 'a') as index_file:
+            for chunk in iter_upload_chunks(upload, job.filename, self.chunk_size):
+                missing = missing_columns(chunk.columns, self.required_columns)
+                if missing:
+                    raise ValueError(f'Missing columns in uploaded file: {", ".join(missing)}')
+
+                # Skip rows committed before a restart
+                chunk = chunk[chunk.index >= done]
+                if chunk.empty:
+                    continue
+
+                history = PredictionHistoryWriter(db.session, self.insert_chunk_size)
+                results = self.process_chunk(chunk, history, performance_stats, job.user_id)
+
+                # Results hit the file before the progress that covers them is committed;
+                # on resume the file is cut back to the committed row count.
+                index_file.write(f"{done} {results_file.tell()}\n")
+                index_file.flush()
+                results_file.write(''.join(json.dumps(result) + '\n' for result in results).encode())
+                results_file.flush()
+                os.fsync(results_file.fileno())
+
+                history.flush()
+                done += len(chunk)
+                job.processed_rows = done
+                job.saved_predictions = (job.saved_predictions or 0) + history.rows_written
+                job.performance_stats = json.dumps(performance_stats)
+                job.updated_at = datetime.utcnow()
+                history.commit()
+
+        job.status = 'completed'
+        job.finished_at = datetime.utcnow()
+        job.updated_at = job.finished_at
+        db.session.commit()
+        logging.info(f"Batch job {job.id} completed: {done} rows")
+
+    @classmethod
+    def _truncate_results(cls, path, lines):
+        """Cut a results file, and its index, back to its first `lines` lines"""
+        if not os.path.exists(path):
+            if os.path.exists(cls._index_path(path)):
+                os.remove(cls._index_path(path))
+            return
+        index = cls._read_index(path)
+        kept = [(row, byte_offset) for row, byte_offset in index if row < lines]
+        with open(path, 'r+b') as handle:
+            # Chunks are committed whole, so `lines` is where an indexed chunk starts
+            starts = dict(index)
+            if lines in starts:
+                handle.seek(starts[lines])
+            else:
+                handle.seek(kept[-1][1] if kept else 0)
+                for _ in range(lines - (kept[-1][0] if kept else 0)):
+                    if not handle.readline():
+                        break
+            handle.truncate()
+        with open(cls._index_path(path), 'w') as handle:
+            handle.writelines(f"{row} {byte_offset}\n" for row, byte_offset in kept)
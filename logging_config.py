@@ -0,0 +1,141 @@
+import re
+import sys
+import json
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMATS = ('json', 'text')
+
+# Correlation id of the request (or batch job) being handled on this thread
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Client-supplied X-Request-ID values are kept only if they look like an id
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# LogRecord attributes; anything else on a record came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+
+def new_request_id(supplied=None):
+    """The client's id if it is a plausible one, else a fresh random id"""
+    if supplied and _REQUEST_ID_PATTERN.match(supplied):
+        return supplied
+    return uuid.uuid4().hex
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current correlation id"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id is not None:
+            entry['request_id'] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread
+
+    The stock prepare() runs the formatter on the logging thread. Only the
+    message arguments and the traceback, which hold references that may not
+    outlive the call, are rendered here. When the bounded queue is full the
+    record is dropped and counted in `dropped` instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _QueueListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full queue rather than failing"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def dropped_log_records():
+    """Records dropped so far because the root logger's queue was full"""
+    return sum(handler.dropped for handler in logging.getLogger().handlers if isinstance(handler, _QueueHandler))
+
+
+def configure_logging(level='INFO', fmt='json', use_queue=True, stream=None, queue_size=10000):
+    """Replace the root logger's handlers with one writing to `stream` (stderr)
+
+    `fmt` is 'json' (one object per line) or 'text'. With use_queue the
+    calling thread only puts the record on a queue and a QueueListener
+    thread formats and writes it, so slow log I/O does not hold up requests.
+    The queue holds at most queue_size records; past that, records are
+    dropped and counted (see dropped_log_records). Returns the listener, or
+    None.
+    """
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {fmt!r}")
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    listener = None
+    if use_queue:
+        log_queue = queue.Queue(maxsize=queue_size)
+        front = _QueueHandler(log_queue)
+        listener = _QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(listener.stop)
+    else:
+        front = handler
+    # The filter runs on the logging thread, where the request's id is set
+    front.addFilter(RequestIdFilter())
+    root.addHandler(front)
+    return listener
@@ -0,0 +1,247 @@
+import time
+import math
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds; wide enough for a 10 µs stage and a 30 s upload
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Timer:
+    """Context manager that observes its elapsed time on a histogram child"""
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        # One slot per bucket plus +Inf; cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """The child for one combination of label values
+
+        Look children up once and keep them where the hot path can reach them;
+        labels() itself takes a lock.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values!r}")
+        values = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._children[values] = self._new_child()
+            return child
+
+    def _label_string(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. rows predicted"""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    def render(self):
+        lines = self._header()
+        for values, child in self._snapshot():
+            lines.append(f"{self.name}{self._label_string(values)} {_format(child.value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. stage durations in seconds"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def render(self):
+        lines = self._header()
+        for values, child in self._snapshot():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = self._label_string(values, [('le', _format(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._label_string(values)
+            lines.append(f"{self.name}_sum{labels} {_format(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Values read from `fn` when scraped, for state that is already counted elsewhere
+
+    `fn` returns {label values tuple: value}; nothing is recorded on the hot path.
+    """
+
+    def __init__(self, name, documentation, kind, labelnames, fn):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in sorted(self.fn().items()):
+            labels = ','.join(f'{name}="{_escape(v)}"' for name, v in zip(self.labelnames, values))
+            lines.append(f"{self.name}{{{labels}}} {_format(value)}" if labels else f"{self.name} {_format(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of one process, rendered in the Prometheus text exposition format
+
+    Every gunicorn worker has its own registry, so a scrape through the load
+    balancer sees one worker; scrape each worker, or run a single worker
+    with threads, to see them all.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, kind, labelnames, fn):
+        return self.register(CallbackMetric(name, documentation, kind, labelnames, fn))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+REGISTRY = MetricsRegistry()
+
+# Where the time of a prediction goes. path is 'single' or 'batch'; stage is
+# one of parse, prepare_features, inference, suggestions, db_write, serialize
+PREDICTION_STAGE_SECONDS = REGISTRY.histogram(
+    'prediction_stage_seconds', 'Time spent in each stage of a prediction request', ('path', 'stage')
+)
+PREDICTION_ROWS = REGISTRY.counter(
+    'prediction_rows_total', 'Students predicted', ('path',)
+)
+PREDICTION_ROW_ERRORS = REGISTRY.counter(
+    'prediction_row_errors_total', 'Students that could not be predicted', ('path',)
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time to handle a request, by endpoint and status', ('endpoint', 'status')
+)
+RETRAIN_SECONDS = REGISTRY.histogram(
+    'model_retrain_seconds', 'Time to retrain the model on prediction history'
+)
+RETRAIN_ROWS = REGISTRY.counter(
+    'model_retrain_rows_total', 'Prediction history rows the model was retrained on'
+)
+
+
+def stage_timer(path, stage):
+    """The histogram child timing one prediction stage, for use as `with ...time():`"""
+    return PREDICTION_STAGE_SECONDS.labels(path, stage)
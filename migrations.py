@@ -0,0 +1,71 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from models import UserPredictionStats
+
+# Applied migrations are recorded here, one row per migration name
+MIGRATIONS_TABLE = 'schema_migrations'
+
+
+def _prediction_history_indexes(connection):
+    """Indexes behind the per-user history and dashboard queries"""
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_prediction_history_user_created "
+        "ON prediction_history (user_id, created_at)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_prediction_history_user_type "
+        "ON prediction_history (user_id, prediction_type)"
+    ))
+
+
+def _backfill_user_prediction_stats(connection):
+    """Fill user_prediction_stats from the history written before it existed"""
+    UserPredictionStats.rebuild(connection)
+
+
+def _drop_prediction_history_user_type_index(connection):
+    """The dashboard's per-type counts come from user_prediction_stats, so no query uses this index"""
+    connection.execute(text("DROP INDEX IF EXISTS ix_prediction_history_user_type"))
+
+
+# Ordered (name, function) pairs. Append new migrations at the end and never
+# edit one that has shipped; each runs once, in its own transaction, and
+# must also be safe on databases whose tables db.create_all() just created.
+MIGRATIONS = [
+    ('0001_prediction_history_indexes', _prediction_history_indexes),
+    ('0002_backfill_user_prediction_stats', _backfill_user_prediction_stats),
+    ('0003_drop_prediction_history_user_type_index', _drop_prediction_history_user_type_index),
+]
+
+
+def run_migrations(engine):
+    """Apply every migration not yet recorded in schema_migrations. Returns the names applied"""
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+            "name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+        ))
+        done = set(connection.execute(text(f"SELECT name FROM {MIGRATIONS_TABLE}")).scalars())
+
+    applied = []
+    for name, migrate in MIGRATIONS:
+        if name in done:
+            continue
+        try:
+            with engine.begin() as connection:
+                migrate(connection)
+                connection.execute(
+                    text(f"INSERT INTO {MIGRATIONS_TABLE} (name, applied_at) VALUES (:name, :applied_at)"),
+                    {'name': name, 'applied_at': datetime.utcnow()}
+                )
+        except IntegrityError:
+            # Another worker applied it first
+            logging.info(f"Migration {name} already applied by another process")
+            continue
+        logging.info(f"Applied migration {name}")
+        applied.append(name)
+    return applied
@@ -0,0 +1,150 @@
+import time
+import logging
+import threading
+
+
+class ModelNotReady(Exception):
+    """Raised when the model is still loading after the wait timeout, or failed to load"""
+
+
+class ModelHolder:
+    """Build the model once, on a background thread or on first use, and hand it out
+
+    `factory` returns the model and should do the heavy imports itself, so
+    importing the web app stays cheap. start() runs it on a daemon thread;
+    get() waits for it, starting the load itself if nothing has. Don't start
+    it in a process that forks workers afterwards (gunicorn --preload): the
+    thread would not survive the fork.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self.error = None
+        self.load_seconds = None
+        self.loaded_at = None
+
+    def start(self):
+        """Begin loading in the background; no-op if already started"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name='model-warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            self._model = self._factory()
+            self.load_seconds = time.perf_counter() - start
+            self.loaded_at = time.time()
+            logging.info(f"Model ready after {self.load_seconds:.2f}s")
+        except Exception as e:
+            self.error = e
+            logging.error(f"Model failed to load: {str(e)}")
+        finally:
+            self._loaded.set()
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    def get(self, timeout=None):
+        """The model, waiting up to `timeout` seconds for it; raises ModelNotReady"""
+        self.start()
+        if not self._loaded.wait(timeout):
+            raise ModelNotReady("Model is still loading")
+        if self._model is None:
+            raise ModelNotReady(f"Model failed to load: {self.error}")
+        return self._model
+
+    def swap(self, model, load_seconds=None):
+        """Serve `model` from now on and return the previous one
+
+        Requests that already hold the previous model finish on it; the
+        caller decides when to close it.
+        """
+        with self._lock:
+            previous, self._model = self._model, model
+            self.load_seconds = load_seconds
+            self.loaded_at = time.time()
+        return previous
+
+
+class ModelReloader:
+    """Keep a ModelHolder on the version the model registry points at
+
+    A daemon thread calls `current_version()` every `interval` seconds (or
+    when woken by request()). When it names a version other than the one
+    being served, `load(version)` builds that model on this thread and it
+    is swapped in; requests never wait for the load. Every worker runs its
+    own reloader, so all of them converge on the registry's version within
+    one interval. A version that fails to load is not retried until the
+    registry points somewhere else.
+    """
+
+    def __init__(self, holder, current_version, load, interval=5.0):
+        self.holder = holder
+        self.current_version = current_version
+        self.load = load
+        self.interval = interval
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._failed = None
+        self.error = None
+
+    def start(self):
+        """Begin polling; no-op if already started"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name='model-reloader', daemon=True)
+                self._thread.start()
+        return self
+
+    def request(self):
+        """Check the registry now instead of at the next interval"""
+        self._wake.set()
+
+    def _poll(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Error checking the model registry: {str(e)}")
+
+    def check(self):
+        """Swap in the registry's version if it differs from the served one; True if it did"""
+        with self._lock:
+            version = self.current_version()
+            if version is None or version == self._failed or not self.holder.ready:
+                return False
+            if self.holder.get().version == version:
+                return False
+
+            start = time.perf_counter()
+            try:
+                model = self.load(version)
+            except Exception as e:
+                self._failed, self.error = version, e
+                logging.error(f"Model {version} failed to load: {str(e)}")
+                return False
+            self._failed = self.error = None
+            self._install(model, time.perf_counter() - start)
+            return True
+
+    def install(self, model, load_seconds=None):
+        """Serve a model built elsewhere in this process, e.g. a retrained one"""
+        with self._lock:
+            self._install(model, load_seconds)
+
+    def _install(self, model, load_seconds):
+        previous = self.holder.swap(model, load_seconds)
+        logging.info(f"Now serving model {model.version}")
+        if previous is not None:
+            previous.close()
@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.preprocessing import LabelEncoder
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Bump when the artifact layout or manifest schema changes
+FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+ESTIMATOR_FILE = 'estimator.joblib'
+CURRENT_FILE = 'CURRENT'
+
+# Versions are the first 16 hex digits of a config hash
+VERSION_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+
+def config_hash(training_config):
+    """Content hash of a training configuration"""
+    payload = json.dumps(training_config, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def base_config(training_config):
+    """A training configuration without its retraining lineage"""
+    return {key: value for key, value in training_config.items() if key != 'retrain'}
+
+
+class ModelStore:
+    """Versioned on-disk store for fitted StudentPerformanceModel artifacts.
+
+    Each artifact lives in its own directory named after the hash of the
+    training configuration that produced it::
+
+        <root>/<version>/manifest.json      metadata, encoders, accuracy
+        <root>/<version>/estimator.joblib   fitted RandomForestClassifier
+        <root>/CURRENT                      version the app should serve
+
+    Artifacts are written to a temporary directory and renamed into place, so
+    readers never see a partially written version. CURRENT is replaced the
+    same way; serving processes poll it and swap to the version it names.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path_for(self, version):
+        return os.path.join(self.root, version)
+
+    @contextmanager
+    def lock(self, name='.lock', blocking=True):
+        """Exclusive lock so only one process trains a missing artifact
+        
+        Locks named `name` are independent of each other. With blocking=False
+        a lock held by another process raises BlockingIOError at once.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, name), 'w') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def save(self, model):
+        """Persist a trained model and return its version"""
+        training_config = model.get_training_config()
+        version = config_hash(training_config)[:16]
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'version': version,
+            'config_hash': config_hash(training_config),
+            'training_config': training_config,
+            'sklearn_version': sklearn.__version__,
+            'accuracy': model.accuracy,
+            'training_stats': model.training_stats,
+            'feature_columns': model.feature_columns,
+            'performance_categories': model.performance_categories,
+            'label_encoders': {
+                name: encoder.classes_.tolist() for name, encoder in model.label_encoders.items()
+            },
+            'created_at': datetime.utcnow().isoformat()
+        }
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        os.chmod(staging, 0o755)
+        try:
+            joblib.dump(model.model, os.path.join(staging, ESTIMATOR_FILE))
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as handle:
+                json.dump(manifest, handle, indent=2)
+
+            target = self.path_for(version)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logging.info(f"Saved model artifact {version} to {self.root}")
+        return version
+
+    def load(self, training_config):
+        """Load the artifact for a training configuration.
+
+        Returns a dict with the estimator, label encoders and metadata, or None
+        when the artifact is missing or stale (different format version,
+        scikit-learn version or training configuration).
+        """
+        digest = config_hash(training_config)
+        return self.load_version(digest[:16], digest)
+
+    def load_version(self, version, config_digest=None, base_config_digest=None):
+        """Load one artifact by version, or None when it is missing or unusable
+
+        With config_digest the artifact must also have been trained with that
+        configuration; with base_config_digest, with that configuration or
+        retrained from a model that was.
+        """
+        if not VERSION_PATTERN.match(version):
+            return None
+        manifest_path = os.path.join(self.path_for(version), MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path) as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Unreadable model manifest {manifest_path}: {str(e)}")
+            return None
+
+        if manifest.get('format_version') != FORMAT_VERSION:
+            logging.info(f"Model artifact {version} has an old format, retraining")
+            return None
+        if manifest.get('sklearn_version') != sklearn.__version__:
+            logging.info(f"Model artifact {version} was built with scikit-learn "
+                         f"{manifest.get('sklearn_version')}, retraining")
+            return None
+        if config_digest is not None and manifest.get('config_hash') != config_digest:
+            return None
+        if base_config_digest is not None and config_hash(base_config(manifest['training_config'])) != base_config_digest:
+            logging.info(f"Model artifact {version} was trained with a different configuration")
+            return None
+
+        # Plain ndarray attributes are memory-mapped; tree node arrays are
+        # copied by scikit-learn when the trees are unpickled.
+        estimator = joblib.load(os.path.join(self.path_for(version), ESTIMATOR_FILE), mmap_mode='r')
+
+        label_encoders = {}
+        for name, classes in manifest['label_encoders'].items():
+            encoder = LabelEncoder()
+            encoder.classes_ = np.array(classes, dtype=object)
+            label_encoders[name] = encoder
+
+        return {
+            'version': version,
+            'estimator': estimator,
+            'label_encoders': label_encoders,
+            'feature_columns': manifest['feature_columns'],
+            'accuracy': manifest['accuracy'],
+            'training_config': manifest['training_config'],
+            'training_stats': manifest.get('training_stats'),
+            'created_at': manifest['created_at']
+        }
+
+    def current(self):
+        """The version CURRENT points at, or None"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as handle:
+                version = handle.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if VERSION_PATTERN.match(version) else None
+
+    def matches_base_config(self, version, training_config):
+        """Whether a stored version was trained with training_config, before any retraining
+
+        Raises ValueError if the version is not in the store.
+        """
+        try:
+            if not VERSION_PATTERN.match(version):
+                raise OSError(version)
+            with open(os.path.join(self.path_for(version), MANIFEST_FILE)) as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError):
+            raise ValueError(f"Model artifact {version} is not in the store")
+        return base_config(manifest['training_config']) == base_config(training_config)
+
+    def set_current(self, version):
+        """Point CURRENT at a stored version; raises ValueError if it is not in the store"""
+        if not VERSION_PATTERN.match(version) or not os.path.exists(
+                os.path.join(self.path_for(version), MANIFEST_FILE)):
+            raise ValueError(f"Model artifact {version} is not in the store")
+        fd, staging = tempfile.mkstemp(prefix='.staging-', dir=self.root)
+        try:
+            with os.fdopen(fd, 'w') as handle:
+                handle.write(version + '\n')
+            os.chmod(staging, 0o644)
+            os.replace(staging, os.path.join(self.root, CURRENT_FILE))
+        except Exception:
+            os.unlink(staging)
+            raise
+        logging.info(f"Model registry now points at {version}")
+
+    def versions(self):
+        """Summaries of the stored artifacts from their manifests, newest first"""
+        summaries = []
+        for version in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            if not VERSION_PATTERN.match(version):
+                continue
+            try:
+                with open(os.path.join(self.path_for(version), MANIFEST_FILE)) as handle:
+                    manifest = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            summaries.append({
+                'version': version,
+                'created_at': manifest['created_at'],
+                'accuracy': manifest['accuracy'],
+                'sklearn_version': manifest.get('sklearn_version'),
+                'parent': manifest['training_config'].get('retrain', {}).get('parent'),
+                'training_stats': manifest.get('training_stats')
+            })
+        return sorted(summaries, key=lambda summary: summary['created_at'], reverse=True)
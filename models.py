@@ -1,9 +1,15 @@
+import json
+import time
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
 
+from metrics import stage_timer
+
 class Base(DeclarativeBase):
     pass
 
@@ -25,13 +31,19 @@ class User(UserMixin, db.Model):  # type: ignore
     
     # Relationships
     predictions = db.relationship('PredictionHistory', backref='user', lazy=True, cascade='all, delete-orphan')
+    prediction_stats = db.relationship('UserPredictionStats', uselist=False, lazy=True, cascade='all, delete-orphan')
     
-    def set_password(self, password):
-        """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password, hasher=None):
+        """Set password hash, computed on a passwords.PasswordHasher when given"""
+        if hasher is not None:
+            self.password_hash = hasher.hash(password)
+        else:
+            self.password_hash = generate_password_hash(password)
     
-    def check_password(self, password):
-        """Check if provided password matches hash"""
+    def check_password(self, password, hasher=None):
+        """Check if provided password matches hash, on a passwords.PasswordHasher when given"""
+        if hasher is not None:
+            return hasher.verify(self.password_hash, password)
         return check_password_hash(self.password_hash, password)
     
     def get_full_name(self):
@@ -43,6 +55,10 @@ class User(UserMixin, db.Model):  # type: ignore
 
 class PredictionHistory(db.Model):  # type: ignore
     __tablename__ = 'prediction_history'
+    # Kept in sync with migrations.py, which adds them to existing databases
+    __table_args__ = (
+        db.Index('ix_prediction_history_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -86,4 +102,222 @@ class PredictionHistory(db.Model):  # type: ignore
         }
     
     def __repr__(self):
-        return f'<PredictionHistory {self.student_name}: {self.predicted_performance}>'
\ No newline at end of file
+        return f'<PredictionHistory {self.student_name}: {self.predicted_performance}>'
+
+class UserPredictionStats(db.Model):  # type: ignore
+    """Running per-user totals of prediction_history, so the dashboard reads one row.
+    
+    record() adds newly inserted history rows in the same transaction as the
+    insert; rebuild() recomputes every row from prediction_history to repair
+    drift (e.g. after history was deleted by hand).
+    """
+    __tablename__ = 'user_prediction_stats'
+    
+    # Counter column for each predicted_performance / prediction_type value
+    PERFORMANCE_COLUMNS = {
+        'Excellent': 'excellent_count',
+        'Good': 'good_count',
+        'Average': 'average_count',
+        'Poor': 'poor_count'
+    }
+    TYPE_COLUMNS = {
+        'batch': 'batch_count',
+        'single': 'single_count'
+    }
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_predictions = db.Column(db.Integer, nullable=False, default=0)
+    excellent_count = db.Column(db.Integer, nullable=False, default=0)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    average_count = db.Column(db.Integer, nullable=False, default=0)
+    poor_count = db.Column(db.Integer, nullable=False, default=0)
+    batch_count = db.Column(db.Integer, nullable=False, default=0)
+    single_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def get_performance_stats(self):
+        """Prediction counts keyed by performance category"""
+        return {performance: getattr(self, column) or 0
+                for performance, column in self.PERFORMANCE_COLUMNS.items()}
+    
+    @classmethod
+    def record(cls, session, rows):
+        """Add new history rows (dicts with user_id, predicted_performance,
+        prediction_type and confidence) to their users' totals
+        """
+        deltas = {}
+        for row in rows:
+            delta = deltas.setdefault(row['user_id'], dict.fromkeys(
+                ['total_predictions', *cls.PERFORMANCE_COLUMNS.values(), *cls.TYPE_COLUMNS.values()], 0
+            ))
+            delta.setdefault('confidence_sum', 0.0)
+            delta['total_predictions'] += 1
+            delta['confidence_sum'] += row['confidence']
+            performance_column = cls.PERFORMANCE_COLUMNS.get(row['predicted_performance'])
+            if performance_column:
+                delta[performance_column] += 1
+            type_column = cls.TYPE_COLUMNS.get(row.get('prediction_type') or 'single')
+            if type_column:
+                delta[type_column] += 1
+        
+        for user_id, delta in deltas.items():
+            cls._increment(session, user_id, delta)
+    
+    @classmethod
+    def _increment(cls, session, user_id, delta):
+        """Atomically add delta to a user's row, creating it if needed"""
+        table = cls.__table__
+        now = datetime.utcnow()
+        dialect = session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            statement = dialect_insert(table).values(user_id=user_id, updated_at=now, **delta)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_=dict({column: table.c[column] + statement.excluded[column] for column in delta},
+                          updated_at=now)
+            )
+            session.execute(statement)
+            return
+        
+        updated = session.execute(
+            update(table).where(table.c.user_id == user_id).values(
+                updated_at=now, **{column: table.c[column] + value for column, value in delta.items()}
+            )
+        ).rowcount
+        if not updated:
+            session.execute(insert(table).values(user_id=user_id, updated_at=now, **delta))
+    
+    @classmethod
+    def rebuild(cls, connection):
+        """Recompute every user's totals from prediction_history. Returns the number of users"""
+        history = PredictionHistory.__table__
+        
+        def count_where(condition):
+            return db.func.coalesce(db.func.sum(case((condition, 1), else_=0)), 0)
+        
+        columns = {
+            'user_id': history.c.user_id,
+            'total_predictions': db.func.count(history.c.id),
+            'confidence_sum': db.func.coalesce(db.func.sum(history.c.confidence), 0.0),
+            'updated_at': db.func.current_timestamp()
+        }
+        for performance, column in cls.PERFORMANCE_COLUMNS.items():
+            columns[column] = count_where(history.c.predicted_performance == performance)
+        for prediction_type, column in cls.TYPE_COLUMNS.items():
+            # Rows without a type were written as single predictions
+            condition = history.c.prediction_type == prediction_type
+            if prediction_type == 'single':
+                condition = condition | history.c.prediction_type.is_(None)
+            columns[column] = count_where(condition)
+        
+        connection.execute(delete(cls.__table__))
+        return connection.execute(
+            insert(cls.__table__).from_select(
+                list(columns),
+                select(*[expression.label(name) for name, expression in columns.items()])
+                .group_by(history.c.user_id)
+            )
+        ).rowcount
+    
+    def __repr__(self):
+        return f'<UserPredictionStats user={self.user_id} total={self.total_predictions}>'
+
+class BatchJob(db.Model):  # type: ignore
+    __tablename__ = 'batch_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    upload_path = db.Column(db.String(500), nullable=False)
+    results_path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    
+    # Progress
+    total_rows = db.Column(db.Integer)  # estimate, None when the format can't tell cheaply
+    processed_rows = db.Column(db.Integer, default=0)
+    saved_predictions = db.Column(db.Integer, default=0)
+    performance_stats = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    
+    # Metadata
+    worker_id = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # heartbeat while running
+    
+    def get_performance_stats(self):
+        """Decoded performance distribution so far"""
+        if not self.performance_stats:
+            return {'Poor': 0, 'Average': 0, 'Good': 0, 'Excellent': 0}
+        return json.loads(self.performance_stats)
+    
+    def to_dict(self):
+        """Convert job to dictionary"""
+        progress = None
+        if self.total_rows:
+            progress = round(min(self.processed_rows / self.total_rows, 1.0), 4)
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'progress': 1.0 if self.status == 'completed' else progress,
+            'saved_predictions': self.saved_predictions,
+            'performance_stats': self.get_performance_stats(),
+            'total_students': self.processed_rows,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<BatchJob {self.id}: {self.status}>'
+
+# Batch history writes: the inserts and the commit, one sample per commit
+_HISTORY_WRITE_SECONDS = stage_timer('batch', 'db_write')
+
+class PredictionHistoryWriter:
+    """Buffered bulk writer for PredictionHistory rows.
+    
+    Rows are plain dicts keyed by column name and are written with Core
+    executemany INSERTs once chunk_size of them are buffered, so no ORM objects
+    are created and memory stays bounded however many rows are written. The
+    inserts run in the session's current transaction until commit().
+    """
+    
+    def __init__(self, session, chunk_size=1000):
+        self.session = session
+        self.chunk_size = max(1, int(chunk_size))
+        self.rows_written = 0
+        self._pending = []
+        self._write_seconds = 0.0
+    
+    def add(self, **values):
+        """Queue one prediction row, flushing when the chunk is full"""
+        self._pending.append(values)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+    
+    def flush(self):
+        """Write all buffered rows and add them to the users' prediction stats"""
+        if not self._pending:
+            return
+        start = time.perf_counter()
+        self.session.execute(PredictionHistory.__table__.insert(), self._pending)
+        UserPredictionStats.record(self.session, self._pending)
+        self._write_seconds += time.perf_counter() - start
+        self.rows_written += len(self._pending)
+        self._pending = []
+    
+    def commit(self):
+        """Flush, commit the session and time the inserts plus the commit as one db_write"""
+        self.flush()
+        start = time.perf_counter()
+        self.session.commit()
+        _HISTORY_WRITE_SECONDS.observe(self._write_seconds + time.perf_counter() - start)
+        self._write_seconds = 0.0
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued"""
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a small, bounded thread pool
+
+    `method` is any Werkzeug hash method, e.g. 'scrypt', 'scrypt:16384:8:1'
+    or 'pbkdf2:sha256:600000'. At most `workers` hashes run at once (hashlib
+    releases the GIL, so each one can occupy a core) and at most
+    `max_pending` wait for a worker; beyond that hash() and verify() raise
+    PasswordHasherBusy instead of queueing, so a login storm cannot take
+    every core from prediction requests.
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_pending=64):
+        self.method = method
+        # Werkzeug writes the method with its defaults filled in as the hash prefix
+        self.prefix = generate_password_hash('', method=method).split('$', 1)[0]
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many password checks in progress")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash of any method"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if a stored hash was made with a different method or work factor"""
+        return password_hash.split('$', 1)[0] != self.prefix
+
+    def close(self):
+        self._executor.shutdown()
@@ -0,0 +1,246 @@
+import copy
+import time
+import logging
+import threading
+import traceback
+from contextlib import ExitStack
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from joblib import parallel_config
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sqlalchemy import select
+
+from models import db, PredictionHistory
+from logging_config import request_id_var
+from metrics import RETRAIN_SECONDS, RETRAIN_ROWS
+
+# prediction_history columns and the student_data columns they hold
+HISTORY_COLUMNS = {
+    'previous_grades': 'Previous_Grades',
+    'attendance_percentage': 'Attendance_Percentage',
+    'study_hours_per_day': 'Study_Hours_Per_Day',
+    'extracurricular_activities': 'Extracurricular_Activities',
+    'interactiveness': 'Interactiveness',
+    'practical_knowledge': 'Practical_Knowledge',
+    'communication_skill': 'Communication_Skill',
+    'projects_handled': 'Projects_Handled',
+    'assignments_completed': 'Assignments_Completed',
+    'predicted_performance': 'Performance',
+}
+
+
+def iter_history_chunks(session, chunk_size=50000, after_id=0):
+    """Yield prediction history rows with id > after_id as DataFrames of up to chunk_size rows
+
+    Pages on the primary key (WHERE id > last id ORDER BY id LIMIT n), so
+    each query is an index range scan and only one chunk is in memory at a
+    time. Frames have an 'id' column plus the student_data columns, with the
+    stored prediction as 'Performance'.
+    """
+    columns = [PredictionHistory.id] + [getattr(PredictionHistory, name) for name in HISTORY_COLUMNS]
+    while True:
+        rows = session.execute(
+            select(*columns).where(PredictionHistory.id > after_id).order_by(PredictionHistory.id).limit(chunk_size)
+        ).all()
+        # End the read transaction, so a long retrain does not hold back WAL checkpoints
+        session.rollback()
+        if not rows:
+            return
+        chunk = pd.DataFrame(rows, columns=['id'] + list(HISTORY_COLUMNS.values()))
+        chunk['Interactiveness'] = chunk['Interactiveness'].astype(int)
+        after_id = int(chunk['id'].iloc[-1])
+        yield chunk
+        if len(rows) < chunk_size:
+            return
+
+
+def _labelled_features(model, data):
+    """The encoded feature matrix and the labels of a frame of students"""
+    return model._prepare_feature_frame(data), data['Performance'].astype(str).to_numpy()
+
+
+def _synthetic_split(model):
+    """The train and test split the model's synthetic training data was fitted on"""
+    config = model.training_config
+    data = model._generate_training_data(n_samples=config['n_samples'], seed=config['seed'])
+    X, y = _labelled_features(model, data)
+    return train_test_split(X, y, test_size=config['test_size'], random_state=config['random_state'], stratify=y)
+
+
+def retrain(model, chunks, trees_per_chunk=10, max_trees=300, anchor_rows_per_class=250,
+            holdout_every=10, seed=0):
+    """Grow a copy of the model's forest on streamed prediction history
+
+    For each chunk from iter_history_chunks, trees_per_chunk trees are added
+    with warm_start and fitted on that chunk alone, so memory is bounded by
+    the chunk size rather than the history. Each chunk is topped up with
+    anchor_rows_per_class rows per class from the synthetic training split:
+    every new tree then sees every class (a warm-started forest requires
+    it) and the forest is not pulled entirely onto what users happened to
+    submit. Rows whose id is a multiple of holdout_every are held out and
+    scored as they arrive, as 'history_agreement'. Past max_trees the oldest
+    added trees are dropped; the original trees are always kept. Returns a
+    new model from model.with_forest, or None when there are no new rows.
+
+    The stored labels are the model's own predictions, so this is
+    self-training: it adapts the forest to the inputs seen in production but
+    cannot correct it without recorded outcomes.
+    """
+    start = time.perf_counter()
+    base = model.model
+    parent_retrain = model.training_config.get('retrain', {})
+    base_trees = parent_retrain.get('base_trees', len(base.estimators_))
+    if max_trees - base_trees < trees_per_chunk:
+        raise ValueError(f"max_trees must leave room for {trees_per_chunk} trees "
+                         f"on top of the {base_trees} original ones")
+
+    forest = copy.copy(base)
+    forest.estimators_ = list(base.estimators_)
+    forest.set_params(warm_start=True)
+
+    X_train, X_test, y_train, y_test = _synthetic_split(model)
+    rng = np.random.default_rng(seed)
+    anchors = np.concatenate([
+        rng.choice(np.flatnonzero(y_train == label), anchor_rows_per_class, replace=True)
+        for label in model.performance_categories
+    ])
+    X_anchor, y_anchor = X_train.iloc[anchors], y_train[anchors]
+
+    rows = held_out = agreed = 0
+    max_id = parent_retrain.get('history_max_id', 0)
+    for chunk in chunks:
+        max_id = max(max_id, int(chunk['id'].max()))
+        known = chunk['Performance'].isin(model.performance_categories)
+        for column in model.CATEGORICAL_COLUMNS:
+            known &= chunk[column].isin(model.label_encoders[column].classes_)
+        chunk = chunk[known]
+        if chunk.empty:
+            continue
+
+        holdout = (chunk['id'] % holdout_every == 0).to_numpy()
+        X, y = _labelled_features(model, chunk)
+        # A fresh seed per chunk, as trimming reuses tree positions
+        forest.set_params(n_estimators=len(forest.estimators_) + trees_per_chunk,
+                          random_state=int(rng.integers(2 ** 31)))
+        with parallel_config(n_jobs=model.n_jobs):
+            forest.fit(pd.concat([X[~holdout], X_anchor]), np.concatenate([y[~holdout], y_anchor]))
+            if holdout.any():
+                agreed += int((forest.predict(X[holdout]) == y[holdout]).sum())
+        rows += int((~holdout).sum())
+        held_out += int(holdout.sum())
+
+        if len(forest.estimators_) > max_trees:
+            forest.estimators_ = (forest.estimators_[:base_trees]
+                                  + forest.estimators_[len(forest.estimators_) - (max_trees - base_trees):])
+        forest.set_params(n_estimators=len(forest.estimators_))
+
+    if rows == 0:
+        return None
+
+    forest.set_params(warm_start=False, random_state=base.random_state)
+    with parallel_config(n_jobs=model.n_jobs):
+        accuracy = accuracy_score(y_test, forest.predict(X_test))
+    training_seconds = time.perf_counter() - start
+    training_stats = {
+        'training_seconds': round(training_seconds, 3),
+        'rows': rows,
+        'rows_per_second': round(rows / training_seconds, 1),
+        'held_out_rows': held_out,
+        'history_agreement': round(agreed / held_out, 4) if held_out else None,
+        'accuracy': round(accuracy, 4),
+        'parent_accuracy': round(model.accuracy, 4),
+        'trees': len(forest.estimators_),
+        'trained_at': datetime.utcnow().isoformat(),
+    }
+    training_config = dict(model.training_config, retrain={
+        'parent': model.version,
+        'base_trees': base_trees,
+        'history_max_id': max_id,
+        'history_rows': parent_retrain.get('history_rows', 0) + rows,
+        'trees_per_chunk': trees_per_chunk,
+        'max_trees': max_trees,
+        'anchor_rows_per_class': anchor_rows_per_class,
+        'seed': seed,
+    })
+    RETRAIN_SECONDS.observe(training_seconds)
+    RETRAIN_ROWS.inc(rows)
+    logging.info(f"Retrained on {rows} history rows in {training_seconds:.2f}s "
+                 f"({training_stats['rows_per_second']:.0f} rows/s), accuracy {accuracy:.3f}",
+                 extra={'retrain': training_stats})
+    return model.with_forest(forest, training_config, accuracy, training_stats)
+
+
+class Retrainer:
+    """Runs retrain() on a background thread, one run at a time, and installs the result
+
+    `get_model()` returns the model being served and `install(model)` swaps
+    the retrained one in. Each run continues from the last history row the
+    served model was retrained on. Options are passed on to retrain(),
+    except chunk_size, which goes to iter_history_chunks. A run holds the
+    store's retrain lock, so only one process retrains at a time. A model
+    whose accuracy is more than max_accuracy_drop below its parent's is
+    saved to the store but not installed, and the run is 'rejected'.
+    """
+
+    def __init__(self, app, get_model, install, store, chunk_size=50000, max_accuracy_drop=0.0, **options):
+        self.app = app
+        self.get_model = get_model
+        self.install = install
+        self.store = store
+        self.chunk_size = chunk_size
+        self.max_accuracy_drop = max_accuracy_drop
+        self.options = options
+        self._lock = threading.Lock()
+        self._thread = None
+        self.status = {'state': 'idle'}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start a run; False if one is already running here or in another process"""
+        with self._lock:
+            if self.running:
+                return False
+            store_lock = ExitStack()
+            try:
+                store_lock.enter_context(self.store.lock('.retrain.lock', blocking=False))
+            except BlockingIOError:
+                return False
+            self.status = {'state': 'running', 'started_at': datetime.utcnow().isoformat()}
+            self._thread = threading.Thread(target=self._run, args=(store_lock,), name='retrain', daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, store_lock):
+        request_id_var.set(f"retrain-{int(time.time())}")
+        status = dict(self.status)
+        try:
+            with store_lock:
+                model = self.get_model()
+                after_id = model.training_config.get('retrain', {}).get('history_max_id', 0)
+                with self.app.app_context():
+                    chunks = iter_history_chunks(db.session, self.chunk_size, after_id)
+                    retrained = retrain(model, chunks, **self.options)
+                if retrained is None:
+                    status.update(state='skipped', reason='No new prediction history')
+                elif retrained.accuracy < model.accuracy - self.max_accuracy_drop:
+                    logging.warning(f"Retrained model {retrained.version} not installed: accuracy "
+                                    f"{retrained.accuracy:.4f} is below its parent's {model.accuracy:.4f}")
+                    status.update(state='rejected', version=retrained.version, parent=model.version,
+                                  reason='Accuracy dropped more than RETRAIN_MAX_ACCURACY_DROP',
+                                  training_stats=retrained.training_stats)
+                else:
+                    self.install(retrained)
+                    status.update(state='succeeded', version=retrained.version, parent=model.version,
+                                  training_stats=retrained.training_stats)
+        except Exception as e:
+            logging.error(f"Error retraining model: {str(e)}")
+            logging.error(traceback.format_exc())
+            status.update(state='failed', error=str(e))
+        status['finished_at'] = datetime.utcnow().isoformat()
+        self.status = status
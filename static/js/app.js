@@ -203,8 +203,8 @@ class StudentPerformanceApp {
             const formData = new FormData();
             formData.append('file', file);
             
-            // Make API call
-            const response = await fetch('/api/predict_batch', {
+            // Make API call; the columnar format keeps large uploads small
+            const response = await fetch('/api/predict_batch?format=columnar', {
                 method: 'POST',
                 body: formData
             });
@@ -216,7 +216,7 @@ class StudentPerformanceApp {
             }
             
             // Store results
-            this.resultsData = result.results;
+            this.resultsData = this.expandColumnarResults(result);
             this.performanceStats = result.performance_stats;
             
             // Show success message
@@ -233,6 +233,20 @@ class StudentPerformanceApp {
         }
     }
     
+    expandColumnarResults(result) {
+        // Rebuild one object per student from a ?format=columnar response
+        const columns = result.columns;
+        const errors = new Map(columns.error_rows.map((row, i) => [row, columns.error_messages[i]]));
+        return columns.student_name.map((studentName, i) => ({
+            student_name: studentName,
+            predicted_performance: result.performance_labels[columns.predicted_performance[i]],
+            confidence: columns.confidence[i],
+            suggestions: errors.has(i)
+                ? [errors.get(i)]
+                : columns.suggestion_ids[i].map(id => result.suggestion_messages[id])
+        }));
+    }
+    
     validateSinglePredictionData(data) {
         // Check for required fields
         for (const [key, value] of Object.entries(data)) {
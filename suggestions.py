@@ -0,0 +1,176 @@
+import operator
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# At most this many suggestions are returned per student
+MAX_SUGGESTIONS = 8
+
+# One row of the rule table. Rules sharing a group form an if/elif chain: only
+# the first matching rule of a group fires. A rule with op None always matches
+# (the chain's else). `column` is a student_data key, or 'Prediction' for the
+# predicted performance. Suggestions come out in table order, which is their
+# priority when more than MAX_SUGGESTIONS match.
+SuggestionRule = namedtuple('SuggestionRule', 'group column op value messages')
+
+SUGGESTION_RULES = [
+    SuggestionRule('grades', 'Previous_Grades', '<', 60, (
+        "Focus on improving foundational knowledge in weak subjects",
+        "Consider getting tutoring or joining study groups")),
+    SuggestionRule('grades', 'Previous_Grades', '<', 80, (
+        "Review and strengthen concepts in subjects with lower grades",)),
+
+    SuggestionRule('attendance', 'Attendance_Percentage', '<', 75, (
+        "Improve class attendance - aim for at least 85% attendance",
+        "Catch up on missed lectures through recordings or notes")),
+    SuggestionRule('attendance', 'Attendance_Percentage', '<', 85, (
+        "Maintain consistent attendance to stay engaged with coursework",)),
+
+    SuggestionRule('study_hours', 'Study_Hours_Per_Day', '<', 3, (
+        "Increase daily study time to at least 3-4 hours",
+        "Create a structured study schedule and stick to it")),
+    SuggestionRule('study_hours', 'Study_Hours_Per_Day', '<', 5, (
+        "Optimize study time with focused, distraction-free sessions",)),
+
+    SuggestionRule('extracurricular', 'Extracurricular_Activities', '<', 2, (
+        "Participate in more extracurricular activities to develop well-rounded skills",)),
+    SuggestionRule('extracurricular', 'Extracurricular_Activities', '>', 5, (
+        "Balance extracurricular activities with academic commitments",)),
+
+    SuggestionRule('interactiveness', 'Interactiveness', '==', 0, (
+        "Increase participation in class discussions and Q&A sessions",
+        "Ask questions when concepts are unclear")),
+
+    SuggestionRule('practical', 'Practical_Knowledge', 'in', ('Poor', 'Moderate'), (
+        "Focus on hands-on practice and practical applications",
+        "Seek internships or project-based learning opportunities")),
+
+    SuggestionRule('communication', 'Communication_Skill', 'in', ('Poor', 'Moderate'), (
+        "Work on improving communication skills through presentations and group work",
+        "Consider joining debate clubs or public speaking groups")),
+
+    SuggestionRule('projects', 'Projects_Handled', '<', 3, (
+        "Take on more project work to gain practical experience",
+        "Collaborate on group projects to learn teamwork skills")),
+
+    SuggestionRule('assignments', 'Assignments_Completed', '<', 15, (
+        "Complete all assigned work on time",
+        "Use assignment feedback to improve future submissions")),
+
+    SuggestionRule('performance', 'Prediction', '==', 'Poor', (
+        "Consider meeting with academic advisors for personalized support",
+        "Explore additional resources like learning centers or peer tutoring")),
+    SuggestionRule('performance', 'Prediction', '==', 'Average', (
+        "Focus on consistency in all areas to move to the next level",
+        "Identify your strongest subjects and leverage them")),
+    SuggestionRule('performance', 'Prediction', '==', 'Good', (
+        "Push yourself with advanced coursework or leadership roles",
+        "Mentor struggling students to reinforce your own learning")),
+    SuggestionRule('performance', 'Prediction', None, None, (  # Excellent
+        "Continue your excellent work and consider research opportunities",
+        "Share your study strategies with peers")),
+]
+
+# Shared message dictionary: a suggestion id is its index in this list.
+# Ids follow table order, so sorting a student's ids restores priority order.
+SUGGESTION_MESSAGES = list(dict.fromkeys(
+    message for rule in SUGGESTION_RULES for message in rule.messages
+))
+_MESSAGE_IDS = {message: i for i, message in enumerate(SUGGESTION_MESSAGES)}
+_RULE_MESSAGE_IDS = [tuple(_MESSAGE_IDS[message] for message in rule.messages) for rule in SUGGESTION_RULES]
+
+_SCALAR_OPS = {
+    '<': operator.lt,
+    '>': operator.gt,
+    '==': operator.eq,
+    'in': lambda value, options: value in options
+}
+_ARRAY_OPS = {
+    '<': np.less,
+    '>': np.greater,
+    '==': np.equal
+}
+
+
+def suggestion_ids(student_data, prediction):
+    """Suggestion ids for one student, in priority order"""
+    ids = []
+    fired = set()
+    for rule, message_ids in zip(SUGGESTION_RULES, _RULE_MESSAGE_IDS):
+        if rule.group in fired:
+            continue
+        value = prediction if rule.column == 'Prediction' else student_data[rule.column]
+        if rule.op is None or _SCALAR_OPS[rule.op](value, rule.value):
+            fired.add(rule.group)
+            ids.extend(message_ids)
+    return list(dict.fromkeys(ids))[:MAX_SUGGESTIONS]
+
+
+def _column_values(values):
+    """A column prepared for _rule_mask: (array, None) if numeric, else factorized (codes, distinct values)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return (values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)), None
+    return pd.factorize(values)
+
+
+def _rule_mask(rule, column):
+    """Rows of a _column_values column matching a rule
+
+    Numeric columns are compared directly; other columns are evaluated once
+    per distinct value with the scalar operator.
+    """
+    values, uniques = column
+    if uniques is None and rule.op in _ARRAY_OPS:
+        return _ARRAY_OPS[rule.op](values, rule.value)
+    if uniques is None:
+        values, uniques = pd.factorize(values)
+    # Code -1 (missing value) picks the trailing False
+    matches = np.array([_SCALAR_OPS[rule.op](value, rule.value) for value in uniques] + [False], dtype=bool)
+    return matches[values]
+
+
+def suggestion_id_matrix(students, predictions):
+    """Boolean (students x messages) matrix of the suggestions each student gets
+
+    Every rule is evaluated once as a mask over the whole DataFrame, and a
+    row keeps its first MAX_SUGGESTIONS suggestions in id order, which gives
+    the same result as suggestion_ids row by row.
+    """
+    n = len(students)
+    selected = np.zeros((n, len(SUGGESTION_MESSAGES)), dtype=bool)
+    columns = {}
+    fired = {}
+    for rule, message_ids in zip(SUGGESTION_RULES, _RULE_MESSAGE_IDS):
+        group_fired = fired.setdefault(rule.group, np.zeros(n, dtype=bool))
+        if rule.op is None:
+            mask = ~group_fired
+        else:
+            if rule.column not in columns:
+                values = predictions if rule.column == 'Prediction' else students[rule.column]
+                columns[rule.column] = _column_values(values)
+            mask = _rule_mask(rule, columns[rule.column]) & ~group_fired
+        group_fired |= mask
+        selected[:, message_ids] |= mask[:, np.newaxis]
+    selected &= np.cumsum(selected, axis=1) <= MAX_SUGGESTIONS
+    return selected
+
+
+def batch_suggestion_ids(students, predictions):
+    """Suggestion ids for every student of a DataFrame, as a list of tuples
+
+    Students with the same combination of suggestions share one tuple.
+    """
+    selected = suggestion_id_matrix(students, predictions)
+    # One bit per message identifies each row's combination (there are fewer than 63 messages)
+    patterns, first, inverse = np.unique(
+        selected @ (1 << np.arange(selected.shape[1], dtype=np.int64)),
+        return_index=True, return_inverse=True
+    )
+    pattern_ids = [tuple(np.flatnonzero(selected[i]).tolist()) for i in first]
+    return [pattern_ids[i] for i in inverse]
+
+
+def suggestion_messages(ids):
+    """Message texts for a sequence of suggestion ids"""
+    return [SUGGESTION_MESSAGES[i] for i in ids]
@@ -0,0 +1,54 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from models import User
+from ttl_cache import TTLCache
+
+
+class UserCache:
+    """Short-lived cache of users for Flask-Login's user_loader
+
+    Entries are a snapshot of the users row (id, role, active_status, names,
+    ...) and load() turns one back into a User merged into the session
+    without a SELECT, so current_user stays an ordinary User instance.
+    Updating or deleting a User through the ORM drops its entry when the
+    flush happens and again after the commit, so a request racing the commit
+    cannot re-cache the old row. Other processes only see changes once their
+    entry expires, so keep `ttl` short.
+    """
+
+    def __init__(self, session, maxsize=10000, ttl=60):
+        self.session = session
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._columns = [attribute.key for attribute in inspect(User).column_attrs]
+        event.listen(User, 'after_update', self._invalidate_on_flush)
+        event.listen(User, 'after_delete', self._invalidate_on_flush)
+        event.listen(session, 'after_commit', self._invalidate_on_commit)
+
+    def load(self, user_id):
+        """The User with this id, or None; served from the cache when possible"""
+        snapshot = self.cache.get(user_id)
+        if snapshot is None:
+            user = self.session.get(User, user_id)
+            if user is None:
+                return None
+            self.cache.set(user_id, {key: getattr(user, key) for key in self._columns})
+            return user
+
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return self.session.merge(user, load=False)
+
+    def invalidate(self, user_id):
+        self.cache.pop(user_id)
+
+    def stats(self):
+        return self.cache.stats()
+
+    def _invalidate_on_flush(self, mapper, connection, target):
+        self.invalidate(target.id)
+        inspect(target).session.info.setdefault('user_cache_invalidate', set()).add(target.id)
+
+    def _invalidate_on_commit(self, session):
+        for user_id in session.info.pop('user_cache_invalidate', ()):
+            self.invalidate(user_id)